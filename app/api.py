@@ -2,18 +2,37 @@
 API routes for grade changes functionality
 """
 
-from fastapi import APIRouter, Request, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+import os
+from fastapi import APIRouter, Request, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, insert, select, tuple_
 from pydantic import BaseModel
-from datetime import datetime, timezone, timedelta
-from .database import get_db, Student, GradeChange, StudentLoginLog
+from typing import List
+from datetime import datetime
+from .database import (
+    get_async_db,
+    get_pool_stats,
+    now_ist,
+    Student,
+    GradeChange,
+    StudentLoginLog,
+    SubjectGradeHistogram,
+    SemesterGpaStats,
+    StudentStanding,
+)
+from .cache import transcript_cache, grade_change_count_cache
+from .pdf_cache import pdf_cache
+from .login_analytics import load_login_analytics
+from .grading import recompute_student_gpas
+from .cohort_stats import cohort_stats_refresher
+from .live_feed import grade_change_to_dict, login_log_to_dict, iter_feed_events
 
 # Create router for API routes
 router = APIRouter(prefix="/api")
 
-IST = timezone(timedelta(hours=5, minutes=30))  # +05:30
+GRADE_CHANGE_BATCH_LIMIT = int(os.getenv("GRADE_CHANGE_BATCH_LIMIT", "200"))
+STUDENT_LOGS_LIMIT = 100
 
 
 def is_admin_authenticated(request: Request) -> bool:
@@ -21,6 +40,12 @@ def is_admin_authenticated(request: Request) -> bool:
     return request.session.get("admin_authenticated", False)
 
 
+def refresh_student_gpas(regnos):
+    """Store the students' recomputed adjusted GPAs and refresh cohort stats"""
+    recompute_student_gpas(regnos)
+    cohort_stats_refresher.schedule()
+
+
 # Pydantic models for API requests
 class GradeChangeRequest(BaseModel):
     regno: str
@@ -32,14 +57,23 @@ class GradeChangeRequest(BaseModel):
     timestamp: str
 
 
+class GradeChangeBatchRequest(BaseModel):
+    changes: List[GradeChangeRequest]
+
+
 @router.post("/grade-changes/")
 async def save_grade_change(
-    grade_change: GradeChangeRequest, request: Request, db: Session = Depends(get_db)
+    grade_change: GradeChangeRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         # Validate that the student exists
-        student = db.query(Student).filter(Student.regno == grade_change.regno).first()
-        if not student:
+        result = await db.execute(
+            select(Student.id).where(Student.regno == grade_change.regno)
+        )
+        if result.first() is None:
             raise HTTPException(status_code=404, detail="Student not found")
 
         # Create new grade change record
@@ -50,13 +84,18 @@ async def save_grade_change(
             original_grade=grade_change.original_grade,
             new_grade=grade_change.new_grade,
             credits=grade_change.credits,
-            changed_at=datetime.now(IST),
+            changed_at=now_ist(),
         )
 
         # Save to database
         db.add(grade_change_record)
-        db.commit()
-        db.refresh(grade_change_record)
+        await db.commit()
+        await db.refresh(grade_change_record)
+
+        # The student's cached transcript no longer reflects this change
+        transcript_cache.invalidate(grade_change.regno)
+        invalidate_grade_change_counts(grade_change.regno)
+        background_tasks.add_task(refresh_student_gpas, [grade_change.regno])
 
         return JSONResponse(
             status_code=200,
@@ -71,7 +110,7 @@ async def save_grade_change(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return JSONResponse(
             status_code=500,
             content={
@@ -81,9 +120,124 @@ async def save_grade_change(
         )
 
 
+@router.post("/grade-changes/batch")
+async def save_grade_changes_batch(
+    batch: GradeChangeBatchRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Save many grade changes in one request
+
+    Admins may change any student's grades; otherwise each change needs the
+    session to be signed in as its student, and the others fail. All students
+    are validated with a single query and the valid changes are inserted in
+    one multi-row statement and one transaction. results holds one entry per
+    submitted change, in order.
+    """
+    if len(batch.changes) > GRADE_CHANGE_BATCH_LIMIT:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "success": False,
+                "message": f"At most {GRADE_CHANGE_BATCH_LIMIT} changes per batch",
+            },
+        )
+
+    try:
+        is_admin = is_admin_authenticated(request)
+        regnos = {
+            change.regno
+            for change in batch.changes
+            if is_admin or request.session.get(f"student_{change.regno}")
+        }
+        result = await db.execute(select(Student.regno).where(Student.regno.in_(regnos)))
+        known_regnos = set(result.scalars().all())
+
+        results = [None] * len(batch.changes)
+        valid_indexes = []
+        rows = []
+        changed_at = now_ist()
+        for index, change in enumerate(batch.changes):
+            if change.regno not in regnos:
+                results[index] = {
+                    "index": index,
+                    "success": False,
+                    "message": "Not authorized for this student",
+                }
+                continue
+            if change.regno not in known_regnos:
+                results[index] = {
+                    "index": index,
+                    "success": False,
+                    "message": "Student not found",
+                }
+                continue
+            valid_indexes.append(index)
+            rows.append(
+                {
+                    "regno": change.regno,
+                    "subject_code": change.subject_code,
+                    "semester": change.semester,
+                    "original_grade": change.original_grade,
+                    "new_grade": change.new_grade,
+                    "credits": change.credits,
+                    "changed_at": changed_at,
+                }
+            )
+
+        if rows:
+            result = await db.execute(
+                insert(GradeChange).returning(
+                    GradeChange.id, sort_by_parameter_order=True
+                ),
+                rows,
+            )
+            change_ids = result.scalars().all()
+            await db.commit()
+
+            for index, change_id in zip(valid_indexes, change_ids):
+                results[index] = {
+                    "index": index,
+                    "success": True,
+                    "change_id": change_id,
+                }
+
+            saved_regnos = {row["regno"] for row in rows}
+            for regno in saved_regnos:
+                transcript_cache.invalidate(regno)
+                invalidate_grade_change_counts(regno)
+            background_tasks.add_task(refresh_student_gpas, sorted(saved_regnos))
+
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": len(rows) == len(batch.changes),
+                "saved": len(rows),
+                "failed": len(batch.changes) - len(rows),
+                "timestamp": changed_at.isoformat(),
+                "results": results,
+            },
+        )
+
+    except Exception as e:
+        await db.rollback()
+        return JSONResponse(
+            status_code=500,
+            content={
+                "success": False,
+                "message": f"Failed to save grade changes: {str(e)}",
+            },
+        )
+
+
 @router.delete("/grade-changes/{change_id}")
 async def delete_grade_change(
-    change_id: int, request: Request, db: Session = Depends(get_db)
+    change_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a specific grade change by ID"""
     # Check admin authentication
@@ -95,7 +249,7 @@ async def delete_grade_change(
 
     try:
         # Find the grade change record
-        grade_change = db.query(GradeChange).filter(GradeChange.id == change_id).first()
+        grade_change = await db.get(GradeChange, change_id)
 
         if not grade_change:
             return JSONResponse(
@@ -104,8 +258,12 @@ async def delete_grade_change(
             )
 
         # Delete the record
-        db.delete(grade_change)
-        db.commit()
+        regno = grade_change.regno
+        await db.delete(grade_change)
+        await db.commit()
+        transcript_cache.invalidate(regno)
+        invalidate_grade_change_counts(regno)
+        background_tasks.add_task(refresh_student_gpas, [regno])
 
         return JSONResponse(
             content={
@@ -116,7 +274,7 @@ async def delete_grade_change(
         )
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return JSONResponse(
             status_code=500,
             content={
@@ -126,70 +284,134 @@ async def delete_grade_change(
         )
 
 
+def encode_grade_change_cursor(change: GradeChange) -> str:
+    """Opaque keyset cursor for a grade change: <changed_at>,<id>"""
+    return f"{change.changed_at.isoformat()},{change.id}"
+
+
+def decode_grade_change_cursor(cursor: str):
+    """Parse a cursor from encode_grade_change_cursor into (changed_at, id)"""
+    changed_at, _, change_id = cursor.rpartition(",")
+    return datetime.fromisoformat(changed_at), int(change_id)
+
+
+async def count_grade_changes(db: AsyncSession, regno: str = None) -> int:
+    """Total grade changes (optionally for one student), cached briefly"""
+    cache_key = regno or ""
+    total_changes = grade_change_count_cache.get(cache_key)
+    if total_changes is None:
+        total_query = select(func.count()).select_from(GradeChange)
+        if regno:
+            total_query = total_query.where(GradeChange.regno == regno)
+        total_changes = await db.scalar(total_query)
+        grade_change_count_cache.set(cache_key, total_changes)
+    return total_changes
+
+
+def invalidate_grade_change_counts(regno: str):
+    grade_change_count_cache.invalidate(regno)
+    grade_change_count_cache.invalidate("")
+
+
 @router.get("/grade-changes/")
 async def get_grade_changes(
-    request: Request, db: Session = Depends(get_db), regno: str = None, limit: int = 100, offset: int = 0
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    regno: str = None,
+    limit: int = 100,
+    offset: int = 0,
+    cursor: str = None,
+    include_total: bool = True,
+    since_id: int = None,
 ):
-    """Get grade changes - all students or filtered by registration number"""
+    """
+    Get grade changes - all students or filtered by registration number
+
+    Results are ordered newest first by (changed_at, id). Pass the previous
+    response's next_cursor as cursor for constant-cost deep pagination;
+    offset is still accepted for compatibility. Set include_total=false to
+    skip the total count, which is otherwise cached for a few seconds.
+    With since_id, only changes with a larger id are returned, oldest first
+    by id, so a client can fetch just what is new since its last load; while
+    has_more is true, it fetches again from latest_id.
+    """
     # Check admin authentication
     if not is_admin_authenticated(request):
         return JSONResponse(
             status_code=401,
             content={"success": False, "message": "Authentication required"},
         )
-        
+
     try:
         # Base query with student names
-        query = db.query(GradeChange, Student.name).join(
+        query = select(GradeChange, Student.name).join(
             Student, GradeChange.regno == Student.regno
         )
 
-        # If regno is provided, filter by it and validate student exists
         if regno:
-            student = db.query(Student).filter(Student.regno == regno).first()
-            if not student:
+            query = query.where(GradeChange.regno == regno)
+
+        if since_id is not None:
+            query = query.where(GradeChange.id > since_id)
+
+        if cursor:
+            try:
+                cursor_changed_at, cursor_id = decode_grade_change_cursor(cursor)
+            except ValueError:
+                return JSONResponse(
+                    status_code=400,
+                    content={"success": False, "message": "Invalid cursor"},
+                )
+            # Served by the (changed_at, id) index
+            query = query.where(
+                tuple_(GradeChange.changed_at, GradeChange.id)
+                < tuple_(cursor_changed_at, cursor_id)
+            )
+        elif offset:
+            query = query.offset(offset)
+
+        # Apply ordering and limit; deltas go oldest first so none are skipped
+        if since_id is not None:
+            query = query.order_by(GradeChange.id)
+        else:
+            query = query.order_by(GradeChange.changed_at.desc(), GradeChange.id.desc())
+        result = await db.execute(query.limit(limit))
+        grade_changes = result.all()
+
+        # Only an empty page needs to tell "no changes" from "no such student"
+        if (
+            regno
+            and not grade_changes
+            and not cursor
+            and not offset
+            and since_id is None
+        ):
+            result = await db.execute(select(Student.id).where(Student.regno == regno))
+            if result.first() is None:
                 raise HTTPException(status_code=404, detail="Student not found")
-            query = query.filter(GradeChange.regno == regno)
-
-        # Apply ordering, offset and limit
-        grade_changes = (
-            query.order_by(GradeChange.changed_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
-        )
 
         # Format the response
-        changes_data = []
-        for change, student_name in grade_changes:
-            changes_data.append(
-                {
-                    "id": change.id,
-                    "regno": change.regno,
-                    "student_name": student_name,
-                    "subject_code": change.subject_code,
-                    "semester": change.semester,
-                    "original_grade": change.original_grade,
-                    "new_grade": change.new_grade,
-                    "credits": change.credits,
-                    "changed_at": change.changed_at.isoformat(),
-                    "grade_difference": f"{change.original_grade} → {change.new_grade}",
-                }
-            )
-
-        # Get total count (with same filter if applied)
-        total_query = db.query(GradeChange)
-        if regno:
-            total_query = total_query.filter(GradeChange.regno == regno)
-        total_changes = total_query.count()
+        changes_data = [
+            grade_change_to_dict(change, student_name)
+            for change, student_name in grade_changes
+        ]
 
         # Prepare response content
         response_content = {
             "success": True,
-            "total_changes": total_changes,
+            "total_changes": (
+                await count_grade_changes(db, regno) if include_total else None
+            ),
             "showing": len(changes_data),
             "offset": offset,
             "limit": limit,
+            "next_cursor": (
+                encode_grade_change_cursor(grade_changes[-1][0])
+                if len(grade_changes) == limit and since_id is None
+                else None
+            ),
+            "has_more": since_id is not None and len(grade_changes) == limit,
+            "latest_id": max((c["id"] for c in changes_data), default=since_id),
             "changes": changes_data,
         }
 
@@ -217,41 +439,46 @@ async def get_grade_changes(
 
 
 @router.get("/student-logs")
-async def student_logs_data(request: Request, db: Session = Depends(get_db)):
-    """API endpoint for student logs data"""
+async def student_logs_data(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    since_id: int = None,
+):
+    """
+    API endpoint for student logs data
+
+    With since_id, only logs with a larger id are returned, oldest first by
+    id, and the stats cover just those logs; while has_more is true, the
+    client fetches again from latest_id.
+    """
     if not is_admin_authenticated(request):
         return JSONResponse({"error": "Unauthorized"}, status_code=401)
 
     try:
-        # Get recent student login logs (last 100)
-        student_logs = (
-            db.query(StudentLoginLog)
-            .order_by(desc(StudentLoginLog.login_time))
-            .limit(100)
-            .all()
-        )
+        # Get recent student login logs (last 100), or the next 100 new ones
+        query = select(StudentLoginLog)
+        if since_id is not None:
+            query = query.where(StudentLoginLog.id > since_id).order_by(
+                StudentLoginLog.id
+            )
+        else:
+            query = query.order_by(desc(StudentLoginLog.login_time))
+        result = await db.execute(query.limit(STUDENT_LOGS_LIMIT))
+        student_logs = result.scalars().all()
 
         # Calculate statistics
         total_logins = len(student_logs)
         unique_students = len(set(log.regno for log in student_logs))
 
         # Format logs for frontend
-        formatted_logs = []
-        for log in student_logs:
-
-            formatted_logs.append(
-                {
-                    "name": log.student_name,
-                    "regno": log.regno,
-                    "login_time": log.login_time.isoformat(),
-                    "ip_address": log.ip_address,
-                    "user_agent": log.user_agent,
-                }
-            )
+        formatted_logs = [login_log_to_dict(log) for log in student_logs]
 
         return JSONResponse(
             {
                 "logs": formatted_logs,
+                "latest_id": max((log.id for log in student_logs), default=since_id),
+                "has_more": since_id is not None
+                and len(student_logs) == STUDENT_LOGS_LIMIT,
                 "stats": {
                     "total_logins": total_logins,
                     "unique_students": unique_students,
@@ -261,3 +488,175 @@ async def student_logs_data(request: Request, db: Session = Depends(get_db)):
 
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@router.get("/student-logs/analytics")
+async def student_logs_analytics(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    days: int = 7,
+    hours: int = 48,
+    top: int = 10,
+):
+    """Login analytics from the rollup tables: cost depends on the window only"""
+    if not is_admin_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    days = max(1, min(days, 366))
+    hours = max(1, min(hours, 24 * 31))
+    top = max(1, min(top, 100))
+
+    try:
+        return JSONResponse(await load_login_analytics(db, days, hours, top))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@router.get("/live-feed")
+async def live_feed_events(
+    request: Request, grade_change_id: int = None, login_id: int = None
+):
+    """
+    Server-sent events for new grade changes and student logins
+
+    grade_change_id and login_id are the newest ids the client already has.
+    Browsers resume from the Last-Event-ID header after a reconnect.
+    """
+    if not is_admin_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            grade_change_id, login_id = map(int, last_event_id.split(":"))
+        except ValueError:
+            pass
+
+    return StreamingResponse(
+        iter_feed_events(grade_change_id, login_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache-stats")
+async def cache_stats(request: Request):
+    """Report transcript and PDF cache hit/miss/eviction counters"""
+    if not is_admin_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    return JSONResponse(
+        {
+            "transcript_cache": transcript_cache.stats(),
+            "pdf_cache": pdf_cache.stats(),
+        }
+    )
+
+
+@router.get("/pool-stats")
+async def pool_stats(request: Request):
+    """Report database connection pool usage and checkout wait times"""
+    if not is_admin_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    return JSONResponse(get_pool_stats())
+
+
+def _decimal(value):
+    return float(value) if value is not None else None
+
+
+@router.get("/stats/semesters")
+async def semester_gpa_stats(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """GPA quantiles per semester (semester 0 is CGPA), from the summary table"""
+    if not is_admin_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    result = await db.execute(select(SemesterGpaStats).order_by(SemesterGpaStats.semester))
+    return JSONResponse(
+        {
+            "semesters": [
+                {
+                    "semester": row.semester,
+                    "students": row.students,
+                    "mean": _decimal(row.mean),
+                    "min": _decimal(row.min),
+                    "p10": _decimal(row.p10),
+                    "p25": _decimal(row.p25),
+                    "p50": _decimal(row.p50),
+                    "p75": _decimal(row.p75),
+                    "p90": _decimal(row.p90),
+                    "max": _decimal(row.max),
+                    "computed_at": row.computed_at.isoformat(),
+                }
+                for row in result.scalars().all()
+            ]
+        }
+    )
+
+
+@router.get("/stats/subjects/{subject_code}")
+async def subject_grade_histogram(
+    subject_code: str, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """Students per grade for one subject, from the summary table"""
+    if not is_admin_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    result = await db.execute(
+        select(SubjectGradeHistogram.grade, SubjectGradeHistogram.students).where(
+            SubjectGradeHistogram.subject_code == subject_code
+        )
+    )
+    histogram = {grade: students for grade, students in result.all()}
+    if not histogram:
+        return JSONResponse({"error": "Subject not found"}, status_code=404)
+
+    return JSONResponse(
+        {
+            "subject_code": subject_code,
+            "students": sum(histogram.values()),
+            "grades": histogram,
+        }
+    )
+
+
+@router.get("/stats/students/{regno}")
+async def student_standing(
+    regno: str, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """A student's rank and percentile per semester and overall"""
+    if not is_admin_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+    result = await db.execute(
+        select(StudentStanding)
+        .where(StudentStanding.regno == regno)
+        .order_by(StudentStanding.semester)
+    )
+    standings = result.scalars().all()
+    if not standings:
+        return JSONResponse({"error": "Student not found"}, status_code=404)
+
+    def to_dict(row):
+        return {
+            "gpa": _decimal(row.gpa),
+            "rank": row.rank,
+            "percentile": _decimal(row.percentile),
+        }
+
+    return JSONResponse(
+        {
+            "regno": regno,
+            "overall": next(
+                (to_dict(row) for row in standings if row.semester == 0), None
+            ),
+            "semesters": [
+                {"semester": row.semester, **to_dict(row)}
+                for row in standings
+                if row.semester != 0
+            ],
+        }
+    )
@@ -0,0 +1,96 @@
+"""
+In-process caches for computed page data
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe cache bounded by entry count (LRU) and entry age (TTL)"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if absent or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries"""
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop a single key if present"""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Computed transcripts keyed by regno. Each uvicorn worker has its own copy:
+# the worker that saves a grade change invalidates its entry directly, and
+# the others notice the student's changed grade change stamp on their next
+# hit (see transcript.get_transcript). PDF ingestion runs in a separate
+# process, so newly ingested semesters show up once the TTL expires.
+transcript_cache = TTLCache(
+    maxsize=int(os.getenv("TRANSCRIPT_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("TRANSCRIPT_CACHE_TTL", "300")),
+)
+
+# Grade change totals for GET /api/grade-changes/, keyed by regno ("" for all)
+grade_change_count_cache = TTLCache(
+    maxsize=1024,
+    ttl=float(os.getenv("GRADE_CHANGE_COUNT_TTL", "30")),
+)
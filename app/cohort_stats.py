@@ -0,0 +1,229 @@
+"""
+Precomputed cohort statistics: grade histograms per subject, GPA quantiles per
+semester and every student's rank and percentile
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from sqlalchemy import insert, text
+
+try:
+    from .database import (
+        now_ist,
+        SessionLocal,
+        SubjectGradeHistogram,
+        SemesterGpaStats,
+        StudentStanding,
+    )
+    from .grading import load_grade_arrays, grouped_gpa
+except ImportError:  # Imported from scripts/ with the app directory on the path
+    from database import (
+        now_ist,
+        SessionLocal,
+        SubjectGradeHistogram,
+        SemesterGpaStats,
+        StudentStanding,
+    )
+    from grading import load_grade_arrays, grouped_gpa
+
+# pg_advisory_xact_lock key serializing rebuilds across workers and processes
+REFRESH_LOCK_KEY = 0x636F686F7274  # "cohort"
+
+QUANTILES = {"p10": 0.10, "p25": 0.25, "p50": 0.50, "p75": 0.75, "p90": 0.90}
+
+
+def rank_and_percentile(values):
+    """
+    Competition rank (1 = highest, ties share a rank) and the percentage of
+    values at or below each value
+    """
+    ascending = np.sort(values)
+    at_or_below = np.searchsorted(ascending, values, side="right")
+    rank = len(values) - at_or_below + 1
+    return rank, 100.0 * at_or_below / len(values)
+
+
+def _distribution(semester: int, regnos, gpas, computed_at: datetime):
+    """Quantile row and standing rows for one semester's GPAs"""
+    valid = ~np.isnan(gpas)
+    regnos, gpas = regnos[valid], gpas[valid]
+    if len(gpas) == 0:
+        return None, []
+
+    quantiles = np.quantile(gpas, list(QUANTILES.values()))
+    stats = {
+        "semester": semester,
+        "students": len(gpas),
+        "mean": round(float(gpas.mean()), 4),
+        "min": round(float(gpas.min()), 4),
+        "max": round(float(gpas.max()), 4),
+        "computed_at": computed_at,
+    }
+    for name, value in zip(QUANTILES, quantiles):
+        stats[name] = round(float(value), 4)
+
+    ranks, percentiles = rank_and_percentile(gpas)
+    standings = [
+        {
+            "regno": regno,
+            "semester": semester,
+            "gpa": round(float(gpa), 4),
+            "rank": int(rank),
+            "percentile": round(float(percentile), 2),
+        }
+        for regno, gpa, rank, percentile in zip(regnos, gpas, ranks, percentiles)
+    ]
+    return stats, standings
+
+
+def compute_cohort_stats(db):
+    """
+    Compute every summary row from the grades, with grade changes applied
+
+    Returns:
+        (histogram rows, semester stats rows, standing rows) as dicts
+    """
+    arrays = load_grade_arrays(db)
+    if len(arrays["credits"]) == 0:
+        return [], [], []
+
+    computed_at = now_ist()
+
+    # Students per grade for each subject, counted with one bincount
+    codes, code_index = np.unique(arrays["subject_code"], return_inverse=True)
+    grades, grade_index = np.unique(arrays["grade"], return_inverse=True)
+    counts = np.bincount(
+        code_index * len(grades) + grade_index, minlength=len(codes) * len(grades)
+    ).reshape(len(codes), len(grades))
+    histograms = [
+        {"subject_code": codes[i], "grade": grades[j], "students": int(counts[i, j])}
+        for i, j in zip(*np.nonzero(counts))
+    ]
+
+    semester_stats, standings = [], []
+
+    # Semester GPAs, each with the regno and semester number of its first row
+    _, semester_gpas, _, _ = grouped_gpa(
+        arrays["semester_id"], arrays["credits"], arrays["points"]
+    )
+    _, first_row = np.unique(arrays["semester_id"], return_index=True)
+    semester_numbers = arrays["semester"][first_row]
+    semester_regnos = arrays["regno"][first_row]
+    for semester in np.unique(semester_numbers):
+        in_semester = semester_numbers == semester
+        stats, rows = _distribution(
+            int(semester),
+            semester_regnos[in_semester],
+            semester_gpas[in_semester],
+            computed_at,
+        )
+        if stats:
+            semester_stats.append(stats)
+            standings.extend(rows)
+
+    # CGPAs, stored as semester 0
+    _, cgpas, _, _ = grouped_gpa(
+        arrays["student_id"], arrays["credits"], arrays["points"]
+    )
+    _, first_row = np.unique(arrays["student_id"], return_index=True)
+    stats, rows = _distribution(0, arrays["regno"][first_row], cgpas, computed_at)
+    if stats:
+        semester_stats.append(stats)
+        standings.extend(rows)
+
+    return histograms, semester_stats, standings
+
+
+def refresh_cohort_stats():
+    """
+    Rebuild the summary tables in one transaction
+
+    Readers keep seeing the previous statistics until the commit. On
+    PostgreSQL, rebuilds from other workers or the CLI wait on an advisory
+    lock held until commit, so two of them never delete and re-insert the
+    same primary keys at once; each computes from the data committed before
+    it got the lock.
+    """
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY}
+            )
+        histograms, semester_stats, standings = compute_cohort_stats(db)
+        for model in (SubjectGradeHistogram, SemesterGpaStats, StudentStanding):
+            db.query(model).delete()
+        for model, rows in (
+            (SubjectGradeHistogram, histograms),
+            (SemesterGpaStats, semester_stats),
+            (StudentStanding, standings),
+        ):
+            if rows:
+                db.execute(insert(model), rows)
+        db.commit()
+        print(
+            f"✅ Cohort stats refreshed: {len(histograms)} histogram bins, "
+            f"{len(semester_stats)} semesters, {len(standings)} standings"
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error refreshing cohort stats: {e}")
+    finally:
+        db.close()
+
+
+class DebouncedRefresh:
+    """
+    Run a job in a background thread once no new request has arrived for
+    `delay` seconds, so a burst of grade changes triggers a single rebuild
+
+    With max_delay, a steady stream of requests cannot postpone the job
+    forever: it runs at most max_delay seconds after the first request it
+    has not yet served.
+    """
+
+    def __init__(self, job, delay: float, max_delay: float = None):
+        self.job = job
+        self.delay = delay
+        self.max_delay = max_delay
+        self._timer = None
+        self._first_pending = None  # When the oldest unserved request came in
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()  # Never run two rebuilds at once
+
+    def schedule(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._first_pending is None:
+                self._first_pending = now
+
+            wait = self.delay
+            if self.max_delay is not None:
+                deadline = self._first_pending + self.max_delay
+                wait = max(0.0, min(wait, deadline - now))
+            self._timer = threading.Timer(wait, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            # Requests from here on may be missed by this run; start a new wait
+            self._first_pending = None
+        with self._run_lock:
+            self.job()
+
+
+cohort_stats_refresher = DebouncedRefresh(
+    refresh_cohort_stats,
+    delay=float(os.getenv("COHORT_STATS_DELAY", "30")),
+    max_delay=float(os.getenv("COHORT_STATS_MAX_DELAY", "120")),
+)
+
+
+if __name__ == "__main__":
+    refresh_cohort_stats()
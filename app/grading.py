@@ -0,0 +1,247 @@
+"""
+Grade point, GPA and CGPA calculation shared by the app and the PDF scripts
+"""
+
+import numpy as np
+from sqlalchemy import update
+
+try:
+    from .database import SessionLocal, Student, Subject, Semester, Grade, GradeChange
+except ImportError:  # Imported from scripts/ with the app directory on the path
+    from database import SessionLocal, Student, Subject, Semester, Grade, GradeChange
+
+# Grade points per credit
+GRADE_POINTS = {
+    "O": 10,
+    "A+": 9,
+    "A": 8,
+    "B+": 7,
+    "B": 6,
+    "C": 5,
+    "U": 0,
+    "RA": 0,
+    "AB": 0,
+    "NA": 0,
+}
+
+
+def grade_points_earned(grade: str, credits: int) -> int:
+    """Grade points earned for a subject (unknown grades earn nothing)"""
+    return GRADE_POINTS.get(grade, 0) * credits
+
+
+def grouped_gpa(group_ids, credits, points):
+    """
+    Credit-weighted average of grade points per group, vectorized
+
+    Every graded subject counts towards the credits, as on the results page.
+
+    Args:
+        group_ids: Group (semester or student) of each graded subject
+        credits: Credits of each subject
+        points: Grade points per credit of each subject
+
+    Returns:
+        (groups, gpa, total_credits, total_grade_points) arrays, with gpa NaN
+        for groups that have no credits
+    """
+    groups, inverse = np.unique(np.asarray(group_ids), return_inverse=True)
+    credits = np.asarray(credits, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64)
+
+    total_credits = np.bincount(inverse, weights=credits, minlength=len(groups))
+    total_grade_points = np.bincount(
+        inverse, weights=credits * points, minlength=len(groups)
+    )
+    gpa = np.divide(
+        total_grade_points,
+        total_credits,
+        out=np.full(len(groups), np.nan),
+        where=total_credits > 0,
+    )
+    return groups, gpa, total_credits, total_grade_points
+
+
+def _latest_grade_changes(db, regnos=None):
+    """Map (regno, subject_code, semester) to the newest changed grade"""
+    query = db.query(
+        GradeChange.regno,
+        GradeChange.subject_code,
+        GradeChange.semester,
+        GradeChange.new_grade,
+    )
+    if regnos is not None:
+        query = query.filter(GradeChange.regno.in_(regnos))
+
+    latest = {}
+    # Oldest first, so later changes overwrite earlier ones
+    for regno, code, semester, new_grade in query.order_by(
+        GradeChange.changed_at, GradeChange.id
+    ):
+        latest[(regno, code, semester)] = new_grade
+    return latest
+
+
+def _gpa_array(gpas):
+    return np.array(
+        [np.nan if gpa is None else float(gpa) for gpa in gpas], dtype=np.float64
+    )
+
+
+def load_grade_arrays(db, regnos=None):
+    """
+    Load every graded subject (optionally for some students) as arrays, with
+    the latest grade changes applied
+
+    Returns:
+        Dict of equal-length arrays: student_id, regno, semester_id,
+        semester, stored_gpa, adjusted_gpa, subject_code, grade, overlaid
+        (whether a grade change applies), credits and points
+    """
+    query = (
+        db.query(
+            Student.id,
+            Student.regno,
+            Semester.id,
+            Semester.semester,
+            Semester.gpa,
+            Semester.adjusted_gpa,
+            Subject.code,
+            Subject.credits,
+            Grade.grade,
+        )
+        .join(Semester, Semester.student_id == Student.id)
+        .join(Grade, Grade.semester_id == Semester.id)
+        .join(Subject, Grade.subject_id == Subject.id)
+    )
+    if regnos is not None:
+        query = query.filter(Student.regno.in_(regnos))
+    rows = query.all()
+    overlay = _latest_grade_changes(db, regnos)
+
+    n = len(rows)
+    columns = list(zip(*rows)) if rows else [()] * 9
+    student_ids, row_regnos, semester_ids, semesters = columns[:4]
+    stored_gpas, adjusted_gpas, codes, credits, grades = columns[4:]
+
+    overlaid = np.zeros(n, dtype=bool)
+    if overlay:
+        keys = list(zip(row_regnos, codes, semesters))
+        overlaid = np.fromiter((key in overlay for key in keys), dtype=bool, count=n)
+        grades = [overlay.get(key, grade) for key, grade in zip(keys, grades)]
+
+    return {
+        "student_id": np.fromiter(student_ids, dtype=np.int64, count=n),
+        "regno": np.array(row_regnos, dtype=object),
+        "semester_id": np.fromiter(semester_ids, dtype=np.int64, count=n),
+        "semester": np.fromiter(semesters, dtype=np.int64, count=n),
+        "stored_gpa": _gpa_array(stored_gpas),
+        "adjusted_gpa": _gpa_array(adjusted_gpas),
+        "subject_code": np.array(codes, dtype=object),
+        "grade": np.array(grades, dtype=object),
+        "overlaid": overlaid,
+        "credits": np.fromiter(credits, dtype=np.float64, count=n),
+        "points": np.fromiter(
+            (GRADE_POINTS.get(grade, 0) for grade in grades), dtype=np.float64, count=n
+        ),
+    }
+
+
+def recompute_gpas(db, regnos=None, write: bool = True):
+    """
+    Recompute semester GPAs and CGPAs for some students or the whole cohort
+
+    When write is true, semesters with grade changes get their recomputed GPA
+    in Semester.adjusted_gpa, and semesters whose changes were all deleted go
+    back to NULL, in one bulk update (the caller commits). The official
+    Semester.gpa from the result PDFs is never written.
+
+    Args:
+        db: Database session
+        regnos: Registration numbers to recompute, or None for everyone
+        write: Whether to update Semester.adjusted_gpa
+
+    Returns:
+        Dict with "semesters" (semester_id -> GPA), "cgpa" (regno -> CGPA)
+        and "updated" (number of semesters whose adjusted GPA changed)
+    """
+    arrays = load_grade_arrays(db, regnos)
+    if len(arrays["credits"]) == 0:
+        return {"semesters": {}, "cgpa": {}, "updated": 0}
+
+    semester_ids, semester_gpas, _, _ = grouped_gpa(
+        arrays["semester_id"], arrays["credits"], arrays["points"]
+    )
+    semester_gpas = np.round(semester_gpas, 2)
+
+    student_ids, cgpas, _, _ = grouped_gpa(
+        arrays["student_id"], arrays["credits"], arrays["points"]
+    )
+    cgpas = np.round(cgpas, 4)
+
+    # Adjusted GPA and regno of each group, taken from its first row
+    _, first_semester_row, semester_index = np.unique(
+        arrays["semester_id"], return_index=True, return_inverse=True
+    )
+    stored_adjusted = arrays["adjusted_gpa"][first_semester_row]
+    _, first_student_row = np.unique(arrays["student_id"], return_index=True)
+    student_regnos = arrays["regno"][first_student_row]
+
+    # Only semesters with a grade change have an adjusted GPA
+    overlaid = np.zeros(len(semester_ids), dtype=bool)
+    overlaid[semester_index[arrays["overlaid"]]] = True
+    adjusted = np.where(overlaid, semester_gpas, np.nan)
+
+    changed = np.isnan(adjusted) != np.isnan(stored_adjusted)
+    changed |= ~np.isnan(adjusted) & ~np.isclose(adjusted, stored_adjusted, atol=0.005)
+    if write and changed.any():
+        db.execute(
+            update(Semester),
+            [
+                {
+                    "id": int(semester_id),
+                    "adjusted_gpa": None if np.isnan(gpa) else float(gpa),
+                }
+                for semester_id, gpa in zip(semester_ids[changed], adjusted[changed])
+            ],
+        )
+
+    return {
+        "semesters": {
+            int(semester_id): None if np.isnan(gpa) else float(gpa)
+            for semester_id, gpa in zip(semester_ids, semester_gpas)
+        },
+        "cgpa": {
+            regno: None if np.isnan(cgpa) else float(cgpa)
+            for regno, cgpa in zip(student_regnos, cgpas)
+        },
+        "updated": int(changed.sum()),
+    }
+
+
+def recompute_student_gpas(regnos):
+    """Recompute and store some students' adjusted GPAs in their own session"""
+    regnos = list(regnos)
+    db = SessionLocal()
+    try:
+        recompute_gpas(db, regnos)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error recomputing GPAs for {', '.join(regnos)}: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        result = recompute_gpas(db)
+        db.commit()
+        print(
+            f"✅ Recomputed {len(result['semesters'])} semester GPAs for "
+            f"{len(result['cgpa'])} students ({result['updated']} adjusted GPAs "
+            "updated)"
+        )
+    finally:
+        db.close()
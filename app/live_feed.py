@@ -0,0 +1,261 @@
+"""
+Live feed of new grade changes and student logins for the admin dashboard
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_sessionmaker, Student, GradeChange, StudentLoginLog
+
+
+def grade_change_to_dict(change: GradeChange, student_name: str) -> dict:
+    """JSON shape of a grade change, shared by the API and the live feed"""
+    return {
+        "id": change.id,
+        "regno": change.regno,
+        "student_name": student_name,
+        "subject_code": change.subject_code,
+        "semester": change.semester,
+        "original_grade": change.original_grade,
+        "new_grade": change.new_grade,
+        "credits": change.credits,
+        "changed_at": change.changed_at.isoformat(),
+        "grade_difference": f"{change.original_grade} → {change.new_grade}",
+    }
+
+
+def login_log_to_dict(log: StudentLoginLog) -> dict:
+    """JSON shape of a login log, shared by the API and the live feed"""
+    return {
+        "id": log.id,
+        "name": log.student_name,
+        "regno": log.regno,
+        "login_time": log.login_time.isoformat(),
+        "ip_address": log.ip_address,
+        "user_agent": log.user_agent,
+    }
+
+
+async def fetch_grade_changes_since(db: AsyncSession, since_id: int, limit: int):
+    """Grade changes with id > since_id, oldest first"""
+    result = await db.execute(
+        select(GradeChange, Student.name)
+        .join(Student, GradeChange.regno == Student.regno)
+        .where(GradeChange.id > since_id)
+        .order_by(GradeChange.id)
+        .limit(limit)
+    )
+    return [grade_change_to_dict(change, name) for change, name in result.all()]
+
+
+async def fetch_login_logs_since(db: AsyncSession, since_id: int, limit: int):
+    """Login logs with id > since_id, oldest first"""
+    result = await db.execute(
+        select(StudentLoginLog)
+        .where(StudentLoginLog.id > since_id)
+        .order_by(StudentLoginLog.id)
+        .limit(limit)
+    )
+    return [login_log_to_dict(log) for log in result.scalars().all()]
+
+
+async def fetch_latest_ids(db: AsyncSession):
+    """Current (max grade change id, max login log id)"""
+    grade_change_id = await db.scalar(select(func.max(GradeChange.id)))
+    login_id = await db.scalar(select(func.max(StudentLoginLog.id)))
+    return grade_change_id or 0, login_id or 0
+
+
+class _IdWindow:
+    """
+    Which ids of one table the poller has delivered
+
+    Ids are assigned at insert but become visible at commit, so a row can
+    appear after rows with higher ids. Every id up to floor was visible at
+    least lag seconds ago and is settled; ids above it are re-scanned on
+    every poll and skipped if already in seen.
+    """
+
+    def __init__(self, floor: int, lag: float):
+        self.floor = floor
+        self.lag = lag
+        self.seen = set()
+        self._high = floor
+        self._marks = deque()  # (poll time, highest id seen by then)
+
+    def advance(self, rows, polled_at: float):
+        """Record a poll started at polled_at; returns its undelivered rows"""
+        fresh = [row for row in rows if row["id"] not in self.seen]
+        for row in fresh:
+            self.seen.add(row["id"])
+            self._high = max(self._high, row["id"])
+
+        self._marks.append((polled_at, self._high))
+        while polled_at - self._marks[0][0] >= self.lag:
+            self.floor = max(self.floor, self._marks.popleft()[1])
+        self.seen = {row_id for row_id in self.seen if row_id > self.floor}
+        return fresh
+
+
+class LiveFeed:
+    """
+    Polls the database once per interval per worker, however many admins are
+    subscribed, and fans new rows out to every subscriber's queue
+
+    The poller only runs while someone is subscribed. Each poll overlaps the
+    last commit_lag seconds of ids, so rows committed out of id order are
+    still delivered, once. Subscribers that fall too far behind are dropped
+    and resume from their cursor on reconnect.
+    """
+
+    def __init__(
+        self, poll_interval: float, commit_lag: float = 30, batch_limit: int = 500
+    ):
+        self.poll_interval = poll_interval
+        self.commit_lag = commit_lag
+        self.batch_limit = batch_limit
+        self._subscribers = set()
+        self._task = None
+        self._start_lock = asyncio.Lock()
+        self._grade_changes = _IdWindow(0, commit_lag)
+        self._logins = _IdWindow(0, commit_lag)
+
+    def is_subscribed(self, queue: asyncio.Queue) -> bool:
+        return queue in self._subscribers
+
+    async def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber, starting the poller if needed"""
+        queue = asyncio.Queue(maxsize=100)
+        self._subscribers.add(queue)
+        try:
+            async with self._start_lock:  # Concurrent subscribers start one poller
+                if self._task is None or self._task.done():
+                    # Set the poller's cursors before returning, so a
+                    # subscriber's catch-up query always overlaps what the
+                    # poller will deliver
+                    async with get_async_sessionmaker()() as db:
+                        grade_change_id, login_id = await fetch_latest_ids(db)
+                    self._grade_changes = _IdWindow(grade_change_id, self.commit_lag)
+                    self._logins = _IdWindow(login_id, self.commit_lag)
+                    self._task = asyncio.create_task(self._run())
+        except BaseException:
+            self._subscribers.discard(queue)
+            raise
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    async def _run(self):
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            polled_at = time.monotonic()
+            grade_changes, logins = self._grade_changes, self._logins
+            try:
+                async with get_async_sessionmaker()() as db:
+                    changes = await fetch_grade_changes_since(
+                        db,
+                        grade_changes.floor,
+                        self.batch_limit + len(grade_changes.seen),
+                    )
+                    logs = await fetch_login_logs_since(
+                        db, logins.floor, self.batch_limit + len(logins.seen)
+                    )
+            except Exception as e:
+                print(f"❌ Live feed poll failed: {e}")
+                continue
+
+            # Every row at or below these floors was delivered by now
+            floors = (grade_changes.floor, logins.floor)
+            changes = grade_changes.advance(changes, polled_at)
+            logs = logins.advance(logs, polled_at)
+
+            events = [("grade_change", change) for change in changes]
+            events += [("login", log) for log in logs]
+            if not events:
+                continue
+
+            for queue in list(self._subscribers):
+                try:
+                    queue.put_nowait((events, floors))
+                except asyncio.QueueFull:
+                    self._subscribers.discard(queue)
+
+
+live_feed = LiveFeed(
+    poll_interval=float(os.getenv("LIVE_FEED_POLL_INTERVAL", "3")),
+    commit_lag=float(os.getenv("LIVE_FEED_COMMIT_LAG", "30")),
+)
+
+
+def _sse(event: str, data, event_id: str = None) -> str:
+    message = f"event: {event}\n"
+    if event_id:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+async def iter_feed_events(grade_change_id: int = None, login_id: int = None):
+    """
+    Server-sent events for rows newer than the client's cursors
+
+    Without cursors the stream starts from the current rows. Rows can be
+    sent out of id order, each once; every event's id holds the cursors
+    below which the client has every row, for resuming. A "resync" event
+    tells the client it missed too much and should reload in full.
+    """
+    queue = await live_feed.subscribe()
+    try:
+        async with get_async_sessionmaker()() as db:
+            if grade_change_id is None or login_id is None:
+                latest_grade_change_id, latest_login_id = await fetch_latest_ids(db)
+                if grade_change_id is None:
+                    grade_change_id = latest_grade_change_id
+                if login_id is None:
+                    login_id = latest_login_id
+
+            # Catch up from the client's cursors
+            changes = await fetch_grade_changes_since(
+                db, grade_change_id, live_feed.batch_limit
+            )
+            logs = await fetch_login_logs_since(db, login_id, live_feed.batch_limit)
+
+        if len(changes) == live_feed.batch_limit or len(logs) == live_feed.batch_limit:
+            yield _sse("resync", {})
+            return
+
+        pending = [("grade_change", change) for change in changes]
+        pending += [("login", log) for log in logs]
+        floors = None
+        cursors = {"grade_change": grade_change_id, "login": login_id}
+        sent = {"grade_change": set(), "login": set()}
+
+        while True:
+            for event, row in pending:
+                # Skip rows already sent by the catch-up query or a poll
+                if row["id"] in sent[event]:
+                    continue
+                sent[event].add(row["id"])
+                yield _sse(event, row, f"{cursors['grade_change']}:{cursors['login']}")
+
+            if floors is not None:
+                # Later polls only deliver rows above these floors
+                for event, floor in zip(("grade_change", "login"), floors):
+                    cursors[event] = max(cursors[event], floor)
+                    sent[event] = {row_id for row_id in sent[event] if row_id > floor}
+
+            try:
+                pending, floors = await asyncio.wait_for(queue.get(), timeout=15)
+            except asyncio.TimeoutError:
+                pending, floors = [], None
+                yield ": keep-alive\n\n"
+
+            if not pending and not live_feed.is_subscribed(queue):
+                # Dropped for falling behind; the client reconnects and resumes
+                return
+    finally:
+        live_feed.unsubscribe(queue)
@@ -0,0 +1,196 @@
+"""
+Login analytics backed by incrementally maintained rollup tables
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .database import (
+    IST,
+    SessionLocal,
+    now_ist,
+    LoginRollupHourly,
+    LoginRollupDaily,
+    LoginRollupStudentDaily,
+    LoginRollupUserAgentDaily,
+)
+
+
+def _ist_wall_time(login_time: datetime) -> datetime:
+    """Naive IST wall-clock time, matching how login_time is stored"""
+    if login_time.tzinfo is not None:
+        login_time = login_time.astimezone(IST).replace(tzinfo=None)
+    return login_time
+
+
+def _add_logins(db: Session, model, key_columns, counts: Counter):
+    """Upsert rollup rows, adding to the logins of rows that already exist"""
+    if not counts:
+        return
+
+    rows = []
+    for key, logins in sorted(counts.items()):  # Stable order avoids deadlocks
+        key = key if isinstance(key, tuple) else (key,)
+        rows.append({**dict(zip(key_columns, key)), "logins": logins})
+
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={"logins": model.logins + stmt.excluded.logins},
+    )
+    db.execute(stmt, rows)
+
+
+def apply_login_rollups(db: Session, rows):
+    """
+    Fold newly written login log rows into the rollup tables
+
+    Call this in the same transaction as the insert of the rows, so rollups
+    never drift from the log. Cost is proportional to the batch, not the log.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Login log dicts with login_time, regno and user_agent
+    """
+    hourly, daily, students, agents = Counter(), Counter(), Counter(), Counter()
+    for row in rows:
+        login_time = _ist_wall_time(row["login_time"])
+        day = login_time.date()
+        hourly[login_time.replace(minute=0, second=0, microsecond=0)] += 1
+        daily[day] += 1
+        students[(day, row["regno"])] += 1
+        agents[(day, (row.get("user_agent") or "unknown")[:500])] += 1
+
+    _add_logins(db, LoginRollupHourly, ["hour_start"], hourly)
+    _add_logins(db, LoginRollupDaily, ["day"], daily)
+    _add_logins(db, LoginRollupStudentDaily, ["day", "regno"], students)
+    _add_logins(db, LoginRollupUserAgentDaily, ["day", "user_agent"], agents)
+
+
+def rebuild_login_rollups():
+    """
+    Recompute every rollup from the full login log (PostgreSQL only)
+
+    Needed once to backfill logs written before the rollups existed. Run
+    upgrade_schema first, so those older logs are in IST wall time like the
+    rollup buckets. The log table is locked against inserts while this runs,
+    so batches flushed concurrently are counted exactly once.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(text("LOCK TABLE student_login_logs IN SHARE MODE"))
+        for model in (
+            LoginRollupHourly,
+            LoginRollupDaily,
+            LoginRollupStudentDaily,
+            LoginRollupUserAgentDaily,
+        ):
+            db.query(model).delete()
+
+        db.execute(
+            text(
+                "INSERT INTO login_rollup_hourly (hour_start, logins) "
+                "SELECT date_trunc('hour', login_time), count(*) "
+                "FROM student_login_logs GROUP BY 1"
+            )
+        )
+        db.execute(
+            text(
+                "INSERT INTO login_rollup_daily (day, logins) "
+                "SELECT login_time::date, count(*) "
+                "FROM student_login_logs GROUP BY 1"
+            )
+        )
+        db.execute(
+            text(
+                "INSERT INTO login_rollup_student_daily (day, regno, logins) "
+                "SELECT login_time::date, regno, count(*) "
+                "FROM student_login_logs GROUP BY 1, 2"
+            )
+        )
+        db.execute(
+            text(
+                "INSERT INTO login_rollup_user_agent_daily (day, user_agent, logins) "
+                "SELECT login_time::date, left(coalesce(user_agent, 'unknown'), 500), "
+                "count(*) FROM student_login_logs GROUP BY 1, 2"
+            )
+        )
+        db.commit()
+        print("✅ Login rollups rebuilt")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding login rollups: {e}")
+    finally:
+        db.close()
+
+
+async def load_login_analytics(db: AsyncSession, days: int, hours: int, top: int):
+    """
+    Read login analytics for the last `days` days (and `hours` hours for the
+    hourly series) from the rollup tables
+    """
+    now = now_ist()
+    since_day = now.date() - timedelta(days=days - 1)
+    since_hour = now.replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=hours - 1
+    )
+
+    per_day = (
+        await db.execute(
+            select(LoginRollupDaily.day, LoginRollupDaily.logins)
+            .where(LoginRollupDaily.day >= since_day)
+            .order_by(LoginRollupDaily.day)
+        )
+    ).all()
+
+    per_hour = (
+        await db.execute(
+            select(LoginRollupHourly.hour_start, LoginRollupHourly.logins)
+            .where(LoginRollupHourly.hour_start >= since_hour)
+            .order_by(LoginRollupHourly.hour_start)
+        )
+    ).all()
+
+    unique_students = await db.scalar(
+        select(func.count(func.distinct(LoginRollupStudentDaily.regno))).where(
+            LoginRollupStudentDaily.day >= since_day
+        )
+    )
+
+    agent_logins = func.sum(LoginRollupUserAgentDaily.logins).label("logins")
+    top_user_agents = (
+        await db.execute(
+            select(LoginRollupUserAgentDaily.user_agent, agent_logins)
+            .where(LoginRollupUserAgentDaily.day >= since_day)
+            .group_by(LoginRollupUserAgentDaily.user_agent)
+            .order_by(agent_logins.desc())
+            .limit(top)
+        )
+    ).all()
+
+    return {
+        "since_day": since_day.isoformat(),
+        "since_hour": since_hour.isoformat(),
+        "total_logins": sum(row.logins for row in per_day),
+        "unique_students": unique_students or 0,
+        "per_day": [
+            {"day": row.day.isoformat(), "logins": row.logins} for row in per_day
+        ],
+        "per_hour": [
+            {"hour_start": row.hour_start.isoformat(), "logins": row.logins}
+            for row in per_hour
+        ],
+        "top_user_agents": [
+            {"user_agent": row.user_agent, "logins": int(row.logins)}
+            for row in top_user_agents
+        ],
+    }
+
+
+if __name__ == "__main__":
+    rebuild_login_rollups()
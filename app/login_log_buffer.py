@@ -0,0 +1,180 @@
+"""
+Write-behind buffering for student login logs
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from sqlalchemy import insert
+from .database import SessionLocal, StudentLoginLog, now_ist
+from .login_analytics import apply_login_rollups
+
+
+def _fit(value, column: str):
+    """Cut value to the length of the StudentLoginLog column"""
+    if value is None:
+        return None
+    return str(value)[: StudentLoginLog.__table__.c[column].type.length]
+
+
+class LoginLogBuffer:
+    """
+    Queue login events in memory and insert them in batches from a
+    background thread
+
+    A batch is flushed once it reaches batch_size rows or flush_interval
+    seconds after its first row, whichever comes first. Every event gets a
+    client-generated event_id, so callers can reference the log row before it
+    is written. If the queue is full, the event is written inline instead of
+    being dropped. Fields are cut to their column lengths up front, so one
+    oversized header cannot fail a whole batch.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.inline_writes = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background flusher"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="login-log-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher after draining every queued event"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def record(
+        self, regno: str, student_name: str, ip_address: str, user_agent: str
+    ) -> str:
+        """
+        Queue a login event for writing
+
+        Returns:
+            The event_id identifying the log row
+        """
+        row = {
+            "event_id": str(uuid.uuid4()),
+            "regno": _fit(regno, "regno"),
+            "student_name": _fit(student_name or "", "student_name"),
+            "login_time": now_ist(),
+            "ip_address": _fit(ip_address, "ip_address"),
+            "user_agent": _fit(user_agent, "user_agent"),
+        }
+
+        if not self.running:
+            self._write([row])
+            return row["event_id"]
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Apply backpressure rather than lose the event
+            self.inline_writes += 1
+            self._write([row])
+        return row["event_id"]
+
+    def _next_batch(self):
+        """Collect up to batch_size rows, waiting at most flush_interval"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = 0 if self._stop.is_set() else deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, rows):
+        """
+        Insert rows in one multi-row statement and fold them into the login
+        rollups in the same transaction, retrying once
+
+        If the batch still fails, its rows are written one at a time, so only
+        the rows that fail on their own are lost.
+        """
+        for attempt in range(2):
+            error = self._insert(rows)
+            if error is None:
+                self.written += len(rows)
+                return
+            print(f"❌ Error writing {len(rows)} login logs (attempt {attempt + 1}): {error}")
+
+        if len(rows) == 1:
+            self.failed += 1
+            return
+        for row in rows:
+            error = self._insert([row])
+            if error is None:
+                self.written += 1
+            else:
+                self.failed += 1
+                print(f"❌ Dropped login log for {row['regno']}: {error}")
+
+    def _insert(self, rows):
+        """Write rows in one transaction; returns the error, or None on success"""
+        db = SessionLocal()
+        try:
+            db.execute(insert(StudentLoginLog), rows)
+            apply_login_rollups(db, rows)
+            db.commit()
+            self.batches += 1
+            return None
+        except Exception as e:
+            db.rollback()
+            return e
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "inline_writes": self.inline_writes,
+            "failed": self.failed,
+        }
+
+
+login_log_buffer = LoginLogBuffer(
+    max_queue=int(os.getenv("LOGIN_LOG_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("LOGIN_LOG_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("LOGIN_LOG_FLUSH_INTERVAL", "1.0")),
+)
@@ -2,7 +2,9 @@
 FastAPI application for student results portal
 """
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -15,10 +17,20 @@ from dotenv import load_dotenv
 from .admin_routes import router as admin_router
 from .api import router as api_router
 from .student_routes import router as student_router
+from .login_log_buffer import login_log_buffer
 
 # Load environment variables
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background writers start with the app and drain on shutdown
+    login_log_buffer.start()
+    yield
+    await asyncio.to_thread(login_log_buffer.stop)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Student Results Portal",
@@ -26,6 +38,7 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    lifespan=lifespan,
 )
 
 # Add session middleware for authentication
@@ -0,0 +1,169 @@
+"""
+Size-bounded local disk cache for PDFs downloaded from Supabase Storage
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from .database import download_pdf
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is only serialized within a process
+    fcntl = None
+
+
+class PDFDiskCache:
+    """
+    Content-addressed PDF cache keyed by storage path, with LRU eviction
+
+    Result PDFs never change once uploaded, so entries are never revalidated.
+    Files are written to a temporary name and atomically renamed into place,
+    so readers in other uvicorn workers never see a partial file. Recency is
+    tracked through file mtimes, which every worker shares, and eviction is
+    serialized across processes with a lock file.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.enabled:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                print(f"⚠️  PDF cache disabled, cannot create {self.directory}: {e}")
+                self.max_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def path_for(self, storage_path: str) -> Path:
+        """Local file path for a storage path (whether cached or not)"""
+        digest = hashlib.sha256(storage_path.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.pdf"
+
+    def get_path(self, storage_path: str):
+        """Return the cached file path and mark it recently used, or None"""
+        if not self.enabled:
+            return None
+
+        path = self.path_for(storage_path)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def read(self, storage_path: str):
+        """Return cached PDF bytes, or None on a miss"""
+        path = self.get_path(storage_path)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:  # Evicted by another worker meanwhile
+            return None
+
+    def put(self, storage_path: str, content: bytes):
+        """Atomically store PDF bytes and evict old entries if over budget"""
+        if not self.enabled or len(content) > self.max_bytes:
+            return None
+
+        path = self.path_for(storage_path)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            print(f"❌ Error caching {storage_path}: {e}")
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            return None
+
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its budget"""
+        with self._lock, open(self.directory / ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            entries = []
+            total_bytes = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".pdf"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+
+            if total_bytes <= self.max_bytes:
+                return
+
+            # Oldest first
+            entries.sort()
+            for _mtime, size, path in entries:
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "directory": str(self.directory),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+pdf_cache = PDFDiskCache(
+    directory=os.getenv(
+        "PDF_CACHE_DIR", str(Path(tempfile.gettempdir()) / "results_pdf_cache")
+    ),
+    max_bytes=int(float(os.getenv("PDF_CACHE_MAX_MB", "512")) * 1024 * 1024),
+)
+
+
+def cached_download_pdf(storage_path: str) -> bytes:
+    """
+    Download PDF content, serving it from the local disk cache when possible
+
+    Args:
+        storage_path: Path in storage
+
+    Returns:
+        PDF file content as bytes, or None if not found
+    """
+    content = pdf_cache.read(storage_path)
+    if content is not None:
+        return content
+
+    content = download_pdf(storage_path)
+    if content:
+        pdf_cache.put(storage_path, content)
+    return content
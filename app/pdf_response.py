@@ -0,0 +1,160 @@
+"""
+PDF responses with HTTP Range, strong ETag and conditional GET support
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=4096)
+def _file_etag(path: str, inode: int, size: int) -> str:
+    """Strong ETag of a file's content, memoized per (path, inode, size)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()}"'
+
+
+def _content_etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header.split(",")]
+    # Weak comparison is used for If-None-Match
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def parse_range(header: str, size: int):
+    """
+    Parse a single-range "bytes=" Range header
+
+    Returns:
+        (start, end) inclusive byte offsets, None if the header should be
+        ignored (malformed or multiple ranges), or "unsatisfiable"
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+
+    start_text, end_text = (part.strip() for part in spec.split("-", 1))
+    try:
+        if not start_text:
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                return "unsatisfiable"
+            return max(size - length, 0), size - 1
+
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+
+    if start > end:
+        return None if end_text else "unsatisfiable"
+    if start >= size:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+def _iter_file(f, start: int, length: int):
+    """Yield length bytes of an open file from start, then close it"""
+    try:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def pdf_response(request: Request, filename: str, path=None, content: bytes = None):
+    """
+    Serve a PDF from a local file or from bytes, honouring conditional and
+    range request headers
+
+    Args:
+        request: Incoming request (for If-None-Match, If-Range and Range)
+        filename: Filename for the Content-Disposition header
+        path: Local file to stream from (preferred)
+        content: PDF bytes, used when no local file is available
+
+    Returns:
+        200, 206, 304 or 416 response
+    """
+    f = None
+    if path is not None:
+        # Open first: an eviction after this point cannot break the response
+        f = open(path, "rb")
+        stat = os.fstat(f.fileno())
+        size = stat.st_size
+        etag = _file_etag(str(path), stat.st_ino, size)
+    else:
+        size = len(content)
+        etag = _content_etag(content)
+
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'inline; filename="{filename}"',
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        if f:
+            f.close()
+        return Response(status_code=304, headers=headers)
+
+    byte_range = parse_range(request.headers.get("range"), size)
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        # The client's copy is stale: send the whole file
+        byte_range = None
+
+    if byte_range == "unsatisfiable":
+        if f:
+            f.close()
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+
+    if f:
+        return StreamingResponse(
+            _iter_file(f, start, length),
+            status_code=status_code,
+            media_type="application/pdf",
+            headers=headers,
+        )
+    return Response(
+        content=content[start : end + 1],
+        status_code=status_code,
+        media_type="application/pdf",
+        headers=headers,
+    )
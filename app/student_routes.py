@@ -2,25 +2,25 @@
 Student routes for viewing results and downloading PDFs
 """
 
-import io
-import zipfile
-from datetime import datetime
+import os
+import re
 from fastapi import APIRouter, Request, HTTPException, Depends, Form
-from fastapi.responses import Response, RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from .database import (
     get_db,
     Student,
-    Subject,
-    Grade,
     Semester,
-    GradeChange,
-    StudentLoginLog,
-    IST,
     download_pdf,
 )
+from .pdf_cache import pdf_cache, cached_download_pdf
+from .pdf_response import pdf_response
+from .login_log_buffer import login_log_buffer
+from .transcript import get_transcript
+from .zip_stream import iter_zip, iter_pdf_entries
 
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
@@ -28,6 +28,18 @@ templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 # Create router for student routes
 router = APIRouter()
 
+# Concurrent PDF downloads when building the ZIP bundle
+ZIP_FETCH_CONCURRENCY = int(os.getenv("ZIP_FETCH_CONCURRENCY", "4"))
+ZIP_FETCH_TIMEOUT = float(os.getenv("ZIP_FETCH_TIMEOUT", "20"))
+
+# Maximum number of students returned by a directory search
+SEARCH_RESULT_LIMIT = int(os.getenv("SEARCH_RESULT_LIMIT", "50"))
+
+# Student directory pagination and streamed rendering
+DIRECTORY_PAGE_SIZE = int(os.getenv("DIRECTORY_PAGE_SIZE", "100"))
+DIRECTORY_MAX_PAGE_SIZE = int(os.getenv("DIRECTORY_MAX_PAGE_SIZE", "1000"))
+DIRECTORY_STREAM_THRESHOLD = int(os.getenv("DIRECTORY_STREAM_THRESHOLD", "200"))
+
 
 @router.head("/")
 @router.get("/")
@@ -37,24 +49,104 @@ def landing_page(request: Request):
 
 
 @router.get("/users/")
-def users_dashboard(request: Request, q: str = "", db: Session = Depends(get_db)):
-    """Users dashboard - search and list students"""
+def users_dashboard(
+    request: Request,
+    q: str = "",
+    after: str = "",
+    before: str = "",
+    limit: int = DIRECTORY_PAGE_SIZE,
+    db: Session = Depends(get_db),
+):
+    """Users dashboard - search students, or browse them a page at a time"""
     q = q.lower()
+    limit = max(1, min(limit, DIRECTORY_MAX_PAGE_SIZE))
 
-    # Query students from database
-    query = db.query(Student)
+    context = {"request": request, "q": q, "limit": limit}
     if q:
-        query = query.filter(
-            (Student.regno.ilike(f"%{q}%")) | (Student.name.ilike(f"%{q}%"))
+        context["results"] = search_students(db, q, limit=SEARCH_RESULT_LIMIT)
+    else:
+        context.update(list_students_page(db, after, before, limit))
+
+    # Stream large pages so the first bytes reach the browser early
+    if len(context["results"]) > DIRECTORY_STREAM_THRESHOLD:
+        template = templates.get_template("students_list.html")
+        return StreamingResponse(template.generate(context), media_type="text/html")
+
+    return templates.TemplateResponse("students_list.html", context)
+
+
+def list_students_page(db: Session, after: str, before: str, limit: int) -> dict:
+    """
+    Keyset-paginate the student directory by regno
+
+    Args:
+        db: Database session
+        after: Return the page following this regno
+        before: Return the page preceding this regno
+        limit: Page size
+
+    Returns:
+        Dict with "results" plus "prev_cursor"/"next_cursor" (None at either end)
+    """
+    query = db.query(Student.regno, Student.name)
+
+    if before:
+        rows = (
+            query.filter(Student.regno < before)
+            .order_by(Student.regno.desc())
+            .limit(limit + 1)
+            .all()
         )
+        has_prev = len(rows) > limit
+        results = list(reversed(rows[:limit]))
+        has_next = True
+    else:
+        if after:
+            query = query.filter(Student.regno > after)
+        rows = query.order_by(Student.regno).limit(limit + 1).all()
+        has_next = len(rows) > limit
+        results = rows[:limit]
+        has_prev = bool(after)
+
+    return {
+        "results": results,
+        "prev_cursor": results[0].regno if results and has_prev else None,
+        "next_cursor": results[-1].regno if results and has_next else None,
+    }
 
-    students = query.all()
-    results = [{"regno": student.regno, "name": student.name} for student in students]
 
-    return templates.TemplateResponse(
-        "students_list.html", {"request": request, "results": results, "q": q}
+def search_students(db: Session, q: str, limit: int):
+    """
+    Substring search on regno and name, most relevant first
+
+    On PostgreSQL the ILIKE filters are served by the pg_trgm GIN indexes
+    (see SCHEMA_UPGRADES) and results are ranked by exact and prefix regno
+    matches, then name prefix, then trigram similarity.
+    """
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    query = db.query(Student.regno, Student.name).filter(
+        Student.regno.ilike(pattern, escape="\\")
+        | Student.name.ilike(pattern, escape="\\")
     )
 
+    relevance = [
+        case(
+            (func.lower(Student.regno) == q, 0),
+            (Student.regno.ilike(f"{escaped}%", escape="\\"), 1),
+            (Student.name.ilike(f"{escaped}%", escape="\\"), 2),
+            else_=3,
+        )
+    ]
+    if db.get_bind().dialect.name == "postgresql":
+        relevance.append(
+            func.greatest(
+                func.similarity(Student.name, q), func.similarity(Student.regno, q)
+            ).desc()
+        )
+
+    return query.order_by(*relevance, Student.regno).limit(limit).all()
+
 
 @router.get("/users/{regno}/")
 def student_auth_page(regno: str, request: Request, db: Session = Depends(get_db)):
@@ -96,20 +188,17 @@ def student_auth_submit(
         client_ip = request.client.host if request.client else "unknown"
         user_agent = request.headers.get("user-agent", "unknown")
 
-        # Create student login log entry
-        login_log = StudentLoginLog(
+        # Queue student login log entry (written in the background)
+        login_log_id = login_log_buffer.record(
             regno=regno,
             student_name=student.name,
-            login_time=datetime.now(IST),
             ip_address=client_ip,
             user_agent=user_agent,
         )
-        db.add(login_log)
-        db.commit()
 
         # Store login log ID in session for logout tracking
         request.session[f"student_{regno}"] = True
-        request.session[f"student_login_log_id_{regno}"] = login_log.id
+        request.session[f"student_login_log_id_{regno}"] = login_log_id
 
         return RedirectResponse(url=f"/users/{regno}/results/", status_code=302)
     else:
@@ -134,120 +223,60 @@ def student_results_page(regno: str, request: Request, db: Session = Depends(get
     if not request.session.get(f"student_{regno}"):
         return RedirectResponse(url=f"/users/{regno}/", status_code=302)
 
-    student = db.query(Student).filter(Student.regno == regno).first()
-    if not student:
+    # Load the whole transcript (cached per student)
+    transcript = get_transcript(db, regno)
+    if transcript is None:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    # Get semesters with grades from database
-    semesters = (
-        db.query(Semester)
-        .filter(Semester.student_id == student.id)
-        .order_by(Semester.semester)
-        .all()
-    )
-
-    if not semesters:
+    if not transcript["files"]:
         raise HTTPException(
             status_code=404, detail="No semester data found for student"
         )
 
-    # Fetch latest grade changes and create a mapping
-    grade_changes = (
-        db.query(GradeChange)
-        .filter(GradeChange.regno == regno)
-        .order_by(GradeChange.changed_at.desc())
-        .all()
-    )
-
-    # Create a mapping of latest grade changes by (subject_code, semester)
-    latest_changes = {}
-    for change in grade_changes:
-        key = (change.subject_code, change.semester)
-        if key not in latest_changes:  # Keep only the most recent change
-            latest_changes[key] = change
-
-    # Grade points mapping
-    grade_points_map = {
-        "O": 10,
-        "A+": 9,
-        "A": 8,
-        "B+": 7,
-        "B": 6,
-        "C": 5,
-        "U": 0,
-        "AB": 0,
-        "NA": 0,
-    }
-
-    # Prepare data for template
-    file_data_list = []
-
-    for semester in semesters:
-        # Get grades for this semester with subject details
-        grades = (
-            db.query(Grade, Subject)
-            .join(Subject, Grade.subject_id == Subject.id)
-            .filter(Grade.semester_id == semester.id)
-            .all()
-        )
-
-        # Calculate totals and prepare subjects list
-        total_credits = 0
-        updated_total_grade_points = 0
-        subjects = []
-
-        for grade, subject in grades:
-            # Check if there's a grade change for this subject
-            key = (subject.code, semester.semester)
-
-            if key in latest_changes:
-                # Use the changed grade
-                change = latest_changes[key]
-                current_grade = change.new_grade
-                grade_points_earned = (
-                    grade_points_map.get(change.new_grade, 0) * subject.credits
-                )
-            else:
-                # Use original grade
-                current_grade = grade.grade
-                grade_points_earned = grade.grade_points_earned
-
-            subjects.append(
-                {
-                    "code": subject.code,
-                    "name": subject.name,
-                    "grade": current_grade,
-                    "credits": subject.credits,
-                    "grade_points_earned": grade_points_earned,
-                }
-            )
-
-            total_credits += subject.credits
-            updated_total_grade_points += grade_points_earned
-
-        # Create semester data for template
-        file_data_list.append(
-            {
-                "filename": f"{regno}_sem{semester.semester}.pdf",
-                "sem": semester.semester,
-                "gpa": float(semester.gpa) if semester.gpa else None,
-                "subjects": subjects,
-                "total_credits": total_credits,
-                "total_grade_points": updated_total_grade_points,
-            }
-        )
-
     return templates.TemplateResponse(
         "student_results.html",
         {
             "request": request,
             "regno": regno,
-            "files": file_data_list,
-            "student_name": student.name,
+            "files": transcript["files"],
+            "student_name": transcript["student_name"],
         },
     )
 
 
+@router.get("/users/{regno}/pdf/{filename}")
+def student_semester_pdf(regno: str, filename: str, request: Request):
+    """Serve one semester's PDF with Range, ETag and conditional GET support"""
+    # Check if user is authenticated for this student
+    if not request.session.get(f"student_{regno}"):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    if not re.fullmatch(rf"{re.escape(regno)}_sem\d+\.pdf", filename):
+        raise HTTPException(status_code=404, detail="PDF not found")
+
+    storage_path = f"{regno}/{filename}"
+
+    # Serve straight from the local cache when possible
+    path = pdf_cache.get_path(storage_path)
+    if path is not None:
+        try:
+            return pdf_response(request, filename, path=path)
+        except FileNotFoundError:
+            pass  # Evicted by another worker; fall through to storage
+
+    pdf_content = download_pdf(storage_path)
+    if not pdf_content:
+        raise HTTPException(status_code=404, detail="PDF not found")
+
+    path = pdf_cache.put(storage_path, pdf_content)
+    if path is not None:
+        try:
+            return pdf_response(request, filename, path=path)
+        except FileNotFoundError:
+            pass
+    return pdf_response(request, filename, content=pdf_content)
+
+
 @router.get("/users/{regno}/zip/")
 def download_student_zip(regno: str, request: Request, db: Session = Depends(get_db)):
     """Download all PDFs for a student as a ZIP file"""
@@ -266,24 +295,24 @@ def download_student_zip(regno: str, request: Request, db: Session = Depends(get
     if not semesters:
         raise HTTPException(status_code=404, detail="No PDFs found for student")
 
-    # Create a zip file in memory
-    zip_buffer = io.BytesIO()
-
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for semester in semesters:
-            # Build storage path directly
-            storage_path = f"{regno}/{regno}_sem{semester.semester}.pdf"
-
-            # Download PDF content from Supabase Storage
-            pdf_content = download_pdf(storage_path)
-            if pdf_content:
-                filename = f"{regno}_sem{semester.semester}.pdf"
-                zip_file.writestr(filename, pdf_content)
-
-    zip_buffer.seek(0)
+    # Resolve semester numbers now; the archive is generated after this returns
+    semester_numbers = [semester.semester for semester in semesters]
+
+    # Download PDFs (local cache, then Supabase Storage) concurrently, in order
+    storage_paths = [
+        f"{regno}/{regno}_sem{semester_num}.pdf"
+        for semester_num in sorted(semester_numbers)
+    ]
+    pdf_entries = iter_pdf_entries(
+        storage_paths,
+        cached_download_pdf,
+        max_workers=ZIP_FETCH_CONCURRENCY,
+        timeout=ZIP_FETCH_TIMEOUT,
+    )
 
-    return Response(
-        content=zip_buffer.getvalue(),
+    # Stream the archive as each PDF arrives instead of buffering it
+    return StreamingResponse(
+        iter_zip(pdf_entries),
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename={regno}_results.zip"},
     )
@@ -0,0 +1,150 @@
+"""
+Transcript loading for the student results page
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .database import Student, Subject, Grade, Semester, GradeChange
+from .cache import transcript_cache
+from .grading import grade_points_earned
+
+
+def load_transcript(db: Session, regno: str):
+    """
+    Load a student's full transcript in two queries
+
+    The first query joins the student, semesters, grades and subjects in one
+    round trip; the second fetches the grade change history. The view model is
+    then built in a single pass over the joined rows.
+
+    Args:
+        db: Database session
+        regno: Student registration number
+
+    Returns:
+        Dict with "student_name", "files" (one entry per semester, empty if
+        the student has no semesters) and "grade_change_stamp" (see
+        grade_change_stamp), or None if the student does not exist
+    """
+    rows = (
+        db.query(Student.name, Semester, Grade, Subject)
+        .outerjoin(Semester, Semester.student_id == Student.id)
+        .outerjoin(Grade, Grade.semester_id == Semester.id)
+        .outerjoin(Subject, Grade.subject_id == Subject.id)
+        .filter(Student.regno == regno)
+        .order_by(Semester.semester, Semester.id, Grade.id)
+        .all()
+    )
+
+    if not rows:
+        return None
+
+    # Fetch latest grade changes and create a mapping
+    grade_changes = (
+        db.query(GradeChange)
+        .filter(GradeChange.regno == regno)
+        .order_by(GradeChange.changed_at.desc())
+        .all()
+    )
+
+    # Create a mapping of latest grade changes by (subject_code, semester)
+    latest_changes = {}
+    for change in grade_changes:
+        key = (change.subject_code, change.semester)
+        if key not in latest_changes:  # Keep only the most recent change
+            latest_changes[key] = change
+
+    # Prepare data for template
+    file_data_list = []
+    semester_data = None
+    current_semester_id = None
+
+    for _name, semester, grade, subject in rows:
+        if semester is None:
+            # Student exists but has no semesters yet
+            continue
+
+        if semester.id != current_semester_id:
+            current_semester_id = semester.id
+            # Create semester data for template
+            semester_data = {
+                "filename": f"{regno}_sem{semester.semester}.pdf",
+                "sem": semester.semester,
+                "gpa": float(semester.gpa) if semester.gpa else None,
+                "subjects": [],
+                "total_credits": 0,
+                "total_grade_points": 0,
+            }
+            file_data_list.append(semester_data)
+
+        if grade is None or subject is None:
+            continue
+
+        # Check if there's a grade change for this subject
+        key = (subject.code, semester.semester)
+
+        if key in latest_changes:
+            # Use the changed grade
+            change = latest_changes[key]
+            current_grade = change.new_grade
+            points_earned = grade_points_earned(change.new_grade, subject.credits)
+        else:
+            # Use original grade
+            current_grade = grade.grade
+            points_earned = grade.grade_points_earned
+
+        semester_data["subjects"].append(
+            {
+                "code": subject.code,
+                "name": subject.name,
+                "grade": current_grade,
+                "credits": subject.credits,
+                "grade_points_earned": points_earned,
+            }
+        )
+
+        semester_data["total_credits"] += subject.credits
+        semester_data["total_grade_points"] += points_earned
+
+    return {
+        "student_name": rows[0][0],
+        "files": file_data_list,
+        "grade_change_stamp": (
+            len(grade_changes),
+            max((change.id for change in grade_changes), default=None),
+        ),
+    }
+
+
+def grade_change_stamp(db: Session, regno: str):
+    """
+    (count, max id) of a student's grade changes
+
+    Saving or deleting a grade change always changes it, whichever worker
+    handled the write.
+    """
+    return tuple(
+        db.query(func.count(GradeChange.id), func.max(GradeChange.id))
+        .filter(GradeChange.regno == regno)
+        .one()
+    )
+
+
+def get_transcript(db: Session, regno: str):
+    """
+    Return the student's transcript, served from the cache when possible
+
+    A cached transcript is only used while the student's grade change stamp
+    is unchanged, so a change saved through another worker process shows up
+    on the next view. The stamp is one indexed query instead of the full
+    load.
+    """
+    transcript = transcript_cache.get(regno)
+    if transcript is not None:
+        if transcript["grade_change_stamp"] == grade_change_stamp(db, regno):
+            return transcript
+
+    transcript = load_transcript(db, regno)
+    if transcript is not None:
+        transcript_cache.set(regno, transcript)
+    return transcript
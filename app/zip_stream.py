@@ -0,0 +1,149 @@
+"""
+Streaming ZIP archives for student PDF bundles
+"""
+
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that buffers ZIP output chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Yield and forget everything written since the last drain"""
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def iter_zip(entries):
+    """
+    Yield a ZIP archive chunk by chunk as its entries become available
+
+    Entries are stored without compression, since PDFs are already
+    compressed. Because the output is not seekable, zipfile writes sizes and
+    CRCs in data descriptors, so only one entry is held in memory at a time.
+
+    Args:
+        entries: Iterable of (filename, bytes) pairs
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zip_file:
+        for filename, content in entries:
+            zip_file.writestr(filename, content)
+            yield from sink.drain()
+    # Central directory is written on close
+    yield from sink.drain()
+
+
+def iter_fetched(keys, fetch, max_workers: int = 4, timeout: float = 20.0):
+    """
+    Fetch several objects concurrently, yielding results in input order
+
+    At most max_workers fetches run or wait to be consumed at once, which
+    bounds memory to max_workers objects. Each fetch gets its own timeout,
+    measured from when it actually starts rather than when it was queued.
+    Timed-out fetches are abandoned, not interrupted.
+
+    Args:
+        keys: Keys to pass to fetch (e.g. storage paths)
+        fetch: Callable returning the object's content, or None if missing
+        max_workers: Maximum number of concurrent fetches
+        timeout: Per-object timeout in seconds
+
+    Yields:
+        (key, content, error) tuples; content is None when error is set or
+        the object is missing
+    """
+    keys = list(keys)
+    if not keys:
+        return
+
+    started = {}
+
+    def timed_fetch(index):
+        started[index] = time.monotonic()
+        return fetch(keys[index])
+
+    max_workers = max(1, min(max_workers, len(keys)))
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # Sliding window: at most max_workers results are held at once
+        pending = deque()
+        next_index = 0
+        while next_index < len(keys) and len(pending) < max_workers:
+            pending.append((next_index, executor.submit(timed_fetch, next_index)))
+            next_index += 1
+
+        while pending:
+            index, future = pending.popleft()
+            while not future.done():
+                start = started.get(index)
+                if start is None:
+                    # Still queued behind the concurrency cap
+                    wait([future], timeout=timeout)
+                    continue
+                remaining = start + timeout - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait([future], timeout=remaining)
+
+            if next_index < len(keys):
+                pending.append((next_index, executor.submit(timed_fetch, next_index)))
+                next_index += 1
+
+            if not future.done():
+                future.cancel()
+                yield keys[index], None, f"timed out after {timeout:g}s"
+                continue
+
+            try:
+                yield keys[index], future.result(), None
+            except Exception as e:
+                yield keys[index], None, str(e) or type(e).__name__
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf_entries(storage_paths, fetch, max_workers: int = 4, timeout: float = 20.0):
+    """
+    ZIP entries for PDFs fetched concurrently, in the order of storage_paths
+
+    PDFs that are missing, fail or time out are left out and listed in a
+    trailing MANIFEST.txt, which is only added when something is missing.
+
+    Yields:
+        (filename, bytes) pairs for iter_zip
+    """
+    manifest = []
+    all_included = True
+
+    for storage_path, pdf_content, error in iter_fetched(
+        storage_paths, fetch, max_workers=max_workers, timeout=timeout
+    ):
+        filename = storage_path.rsplit("/", 1)[-1]
+        if pdf_content:
+            manifest.append(f"{filename}: included")
+            yield filename, pdf_content
+        else:
+            all_included = False
+            status = f"failed ({error})" if error else "not available"
+            manifest.append(f"{filename}: {status}")
+
+    # Report missing or failed PDFs inside the archive
+    if not all_included:
+        yield "MANIFEST.txt", ("\n".join(manifest) + "\n").encode("utf-8")
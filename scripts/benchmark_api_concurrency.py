@@ -0,0 +1,114 @@
+"""
+Benchmark - Admin API throughput and event-loop responsiveness under load
+
+Logs in as admin, then runs concurrent clients against an API endpoint for a
+fixed duration while a probe measures /health latency. A worker whose async
+routes block on database I/O shows low throughput and a /health p99 close to
+the DB round-trip time; with async sessions /health stays fast.
+
+Run it against a single-worker server built before and after a change:
+    uvicorn app.main:app --workers 1
+    ADMIN_PASSWORD=... python scripts/benchmark_api_concurrency.py \\
+        --base-url http://localhost:8000 --concurrency 32 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run_clients(client, path: str, concurrency: int, duration: float):
+    """Hammer path with concurrency clients; return (latencies, errors)"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def probe_health(client, duration: float, interval: float = 0.05):
+    """Sample /health latency while the load runs"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/grade-changes/?limit=20")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=60.0
+    ) as client:
+        await client.post(
+            "/admin/login/", data={"password": os.getenv("ADMIN_PASSWORD", "")}
+        )
+        if "session" not in client.cookies:
+            print("❌ Admin login failed - set ADMIN_PASSWORD")
+            return
+
+        print(
+            f"🚀 {args.concurrency} clients on {args.path} for {args.duration:.0f}s..."
+        )
+        (latencies, errors), health = await asyncio.gather(
+            run_clients(client, args.path, args.concurrency, args.duration),
+            probe_health(client, args.duration),
+        )
+
+    print(f"✅ Requests: {len(latencies)} ok, {errors} failed")
+    print(f"📊 Throughput: {len(latencies) / args.duration:.1f} req/s")
+    if latencies:
+        print(
+            f"⏱️  API latency: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p99 {percentile(latencies, 99) * 1000:.1f} ms"
+        )
+    if health:
+        print(
+            f"💓 /health latency under load: "
+            f"p50 {statistics.median(health) * 1000:.1f} ms, "
+            f"p99 {percentile(health, 99) * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
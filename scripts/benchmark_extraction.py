@@ -0,0 +1,111 @@
+"""
+Benchmark - Per-PDF CPU time of full vs page-targeted text extraction
+
+Writes the synthetic corpus from benchmark_ingestion.py and times
+PDFProcessor.parse_pdf over it with both extraction modes, splitting the
+CPU time between fitz text extraction and field parsing, and checks both
+modes parse every PDF identically.
+
+--trailing-pages appends that many pages of notes after the results, as
+on printouts that carry a grading legend, to show what page targeting skips.
+
+Usage:
+    python scripts/benchmark_extraction.py --pdfs 500 --trailing-pages 1
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_ingestion import build_corpus  # noqa: E402
+from pdf_processor import PDFProcessor  # noqa: E402
+
+NOTES = [
+    "O - Outstanding, A+ - Excellent, A - Very Good, B+ - Good",
+    "B - Average, C - Satisfactory, U - Re-appearance, AB - Absent",
+    "These results are provisional and subject to verification.",
+]
+
+
+def add_trailing_pages(paths, pages: int):
+    for path in paths:
+        doc = fitz.open(path)
+        for _ in range(pages):
+            page = doc.new_page()
+            for number, line in enumerate(NOTES * 12):
+                page.insert_text((50, 50 + 14 * number), line, fontsize=10)
+        doc.save(path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        doc.close()
+
+
+def time_mode(paths, targeted: bool, rounds: int):
+    """Parsed results and (extraction, parsing) CPU seconds per PDF"""
+    processor = PDFProcessor(worker=True, targeted=targeted)
+    extract_s = parse_s = 0.0
+    for _ in range(rounds):
+        parsed = []
+        for path in paths:
+            start = time.process_time()
+            text = processor.extract_pdf_text(path)
+            extracted = time.process_time()
+            parsed.append(
+                (
+                    processor.extract_regno(text),
+                    processor.extract_semester_number(text),
+                    processor.extract_name(text),
+                    processor.extract_dob(text),
+                    processor.extract_gpa(text),
+                    processor.subject_regex.findall(text),
+                )
+            )
+            extract_s += extracted - start
+            parse_s += time.process_time() - extracted
+    runs = rounds * len(paths)
+    return parsed, extract_s / runs, parse_s / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdfs", type=int, default=500)
+    parser.add_argument("--trailing-pages", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🧱 Writing {args.pdfs} synthetic PDFs...")
+        paths = build_corpus(Path(tmp), args.pdfs)
+        if args.trailing_pages:
+            add_trailing_pages(paths, args.trailing_pages)
+
+        # Untimed pass so neither mode pays for warming MuPDF's caches
+        warm_up = PDFProcessor(worker=True)
+        for path in paths:
+            warm_up.extract_pdf_text(path)
+
+        full, full_extract, full_parse = time_mode(paths, False, args.rounds)
+        targeted, targeted_extract, targeted_parse = time_mode(
+            paths, True, args.rounds
+        )
+        assert full == targeted, "extraction modes parsed differently"
+
+    full_total = full_extract + full_parse
+    targeted_total = targeted_extract + targeted_parse
+    for label, extract_s, parse_s in (
+        ("📄 All pages", full_extract, full_parse),
+        ("🎯 Targeted ", targeted_extract, targeted_parse),
+    ):
+        print(
+            f"{label}: {(extract_s + parse_s) * 1e3:.2f} ms CPU/PDF "
+            f"(extract {extract_s * 1e3:.2f} ms, parse {parse_s * 1e6:.0f} µs)"
+        )
+    print(f"⚡ Speedup:    {full_total / targeted_total:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
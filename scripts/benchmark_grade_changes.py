@@ -0,0 +1,120 @@
+"""
+Benchmark - OFFSET vs keyset pagination and COUNT(*) on grade changes
+
+Builds a TEMP copy of grade_changes (never touching the real table), fills it
+with synthetic rows using generate_series, adds the (changed_at, id) index
+and then times the old OFFSET query, the keyset query at the same depth,
+and the full COUNT(*) the endpoint used to run on every call.
+
+Requires DATABASE_URL to point at PostgreSQL.
+
+Usage:
+    python scripts/benchmark_grade_changes.py --rows 1000000 --page-size 100
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import engine  # noqa: E402
+
+OFFSET_SQL = """
+    SELECT * FROM bench_grade_changes
+    ORDER BY changed_at DESC, id DESC
+    OFFSET :offset LIMIT :limit
+"""
+
+KEYSET_SQL = """
+    SELECT * FROM bench_grade_changes
+    WHERE (changed_at, id) < (:changed_at, :id)
+    ORDER BY changed_at DESC, id DESC
+    LIMIT :limit
+"""
+
+CURSOR_SQL = """
+    SELECT changed_at, id FROM bench_grade_changes
+    ORDER BY changed_at DESC, id DESC
+    OFFSET :offset LIMIT 1
+"""
+
+
+def timed(conn, sql: str, params: dict, repeat: int) -> float:
+    """Median wall time of a query in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("❌ This benchmark needs a PostgreSQL DATABASE_URL")
+        return
+
+    with engine.connect() as conn:
+        print(f"🧱 Building temp table with {args.rows:,} synthetic rows...")
+        conn.execute(
+            text(
+                "CREATE TEMP TABLE bench_grade_changes "
+                "(LIKE grade_changes INCLUDING DEFAULTS)"
+            )
+        )
+        conn.execute(
+            text(
+                """
+                INSERT INTO bench_grade_changes
+                    (id, regno, subject_code, semester, original_grade,
+                     new_grade, credits, changed_at)
+                SELECT g,
+                       lpad((g % 5000)::text, 12, '0'),
+                       '21CS' || (g % 90)::text || 'T',
+                       1 + g % 8, 'B', 'A', 3,
+                       now() - (g || ' seconds')::interval
+                FROM generate_series(1, :rows) AS g
+                """
+            ),
+            {"rows": args.rows},
+        )
+        conn.execute(
+            text("CREATE INDEX ON bench_grade_changes (changed_at, id)")
+        )
+        conn.execute(text("ANALYZE bench_grade_changes"))
+
+        count_ms = timed(
+            conn, "SELECT count(*) FROM bench_grade_changes", {}, args.repeat
+        )
+        print(f"🔢 COUNT(*): {count_ms:.1f} ms per call\n")
+
+        print(f"{'depth':>10} | {'OFFSET ms':>10} | {'keyset ms':>10}")
+        for depth in (0, 1_000, 10_000, 100_000, args.rows // 2, args.rows - 1000):
+            if depth >= args.rows:
+                continue
+            params = {"offset": depth, "limit": args.page_size}
+            offset_ms = timed(conn, OFFSET_SQL, params, args.repeat)
+
+            row = conn.execute(text(CURSOR_SQL), {"offset": depth}).first()
+            keyset_params = {
+                "changed_at": row.changed_at,
+                "id": row.id,
+                "limit": args.page_size,
+            }
+            keyset_ms = timed(conn, KEYSET_SQL, keyset_params, args.repeat)
+            print(f"{depth:>10,} | {offset_ms:>10.2f} | {keyset_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Benchmark - Vectorized vs per-row GPA/CGPA recomputation
+
+Generates a synthetic cohort in memory, applies a sprinkling of grade-change
+overlays and times a plain Python loop over the graded subjects against
+app.grading.grouped_gpa, checking both agree.
+
+With --db-students it also seeds a scratch SQLite database (never the
+configured one) with a cohort and its grade changes, and times the whole
+app.grading.recompute_gpas path: loading the grades, applying the overlays
+and writing the adjusted GPAs.
+
+Usage:
+    python scripts/benchmark_grading.py --students 100000 --semesters 8 --subjects 6
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import insert
+
+# Database runs go to a scratch SQLite database, never to the configured one
+SCRATCH_DB = Path(tempfile.gettempdir()) / "benchmark_grading.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DB}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import (  # noqa: E402
+    Base,
+    SessionLocal,
+    engine,
+    Student,
+    Subject,
+    Semester,
+    Grade,
+    GradeChange,
+)
+from app.grading import (  # noqa: E402
+    GRADE_POINTS,
+    grade_points_earned,
+    grouped_gpa,
+    load_grade_arrays,
+    recompute_gpas,
+)
+
+
+def build_cohort(students: int, semesters: int, subjects: int, change_rate: float):
+    """Synthetic graded subjects as arrays, with grade changes applied"""
+    rng = np.random.default_rng(42)
+    rows = students * semesters * subjects
+
+    student_id = np.repeat(np.arange(students), semesters * subjects)
+    semester_id = np.repeat(np.arange(students * semesters), subjects)
+    credits = rng.choice([1, 2, 3, 4], size=rows).astype(np.float64)
+
+    grade_names = np.array(list(GRADE_POINTS))
+    grade_points = np.array([GRADE_POINTS[g] for g in grade_names], dtype=np.float64)
+    grades = rng.integers(0, len(grade_names), size=rows)
+
+    # Overlay: a fraction of subjects get a newer grade
+    changed = rng.random(rows) < change_rate
+    grades[changed] = rng.integers(0, len(grade_names), size=int(changed.sum()))
+
+    return {
+        "student_id": student_id,
+        "semester_id": semester_id,
+        "credits": credits,
+        "grade": grade_names[grades],
+        "points": grade_points[grades],
+        "changed": changed,
+        "changes": int(changed.sum()),
+    }
+
+
+def python_loop(cohort):
+    """The per-row approach: dict lookups and running totals"""
+    semester_totals = defaultdict(lambda: [0.0, 0.0])
+    student_totals = defaultdict(lambda: [0.0, 0.0])
+    for student, semester, credits, grade in zip(
+        cohort["student_id"].tolist(),
+        cohort["semester_id"].tolist(),
+        cohort["credits"].tolist(),
+        cohort["grade"].tolist(),
+    ):
+        earned = GRADE_POINTS.get(grade, 0) * credits
+        semester_totals[semester][0] += credits
+        semester_totals[semester][1] += earned
+        student_totals[student][0] += credits
+        student_totals[student][1] += earned
+
+    semester_gpa = {k: gp / c for k, (c, gp) in semester_totals.items() if c}
+    cgpa = {k: gp / c for k, (c, gp) in student_totals.items() if c}
+    return semester_gpa, cgpa
+
+
+def vectorized(cohort):
+    _, semester_gpa, _, _ = grouped_gpa(
+        cohort["semester_id"], cohort["credits"], cohort["points"]
+    )
+    _, cgpa, _, _ = grouped_gpa(
+        cohort["student_id"], cohort["credits"], cohort["points"]
+    )
+    return semester_gpa, cgpa
+
+
+def seed_database(cohort, semesters: int, subjects: int):
+    """Write the cohort's original grades and its grade changes to SCRATCH_DB"""
+    engine.dispose()
+    SCRATCH_DB.unlink(missing_ok=True)
+    Base.metadata.create_all(engine)
+
+    students = int(cohort["student_id"][-1]) + 1
+    regnos = [f"1132220{number:05d}" for number in range(students)]
+    rng = np.random.default_rng(7)
+    codes = [
+        f"21CS{semester}{index:02d}T"
+        for semester in range(1, semesters + 1)
+        for index in range(subjects)
+    ]
+    # Grades as printed, before the overlay drew new ones for changed rows
+    original = cohort["grade"].copy()
+    changed = np.flatnonzero(cohort["changed"])
+    original[changed] = np.array(list(GRADE_POINTS))[
+        rng.integers(0, len(GRADE_POINTS), size=len(changed))
+    ]
+
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Student),
+            [
+                {"regno": regno, "name": "Student", "dob": "01-01-2004"}
+                for regno in regnos
+            ],
+        )
+        connection.execute(
+            insert(Subject),
+            [
+                {
+                    "code": code,
+                    "name": "Subject",
+                    "credits": 3,
+                    "semester": index // subjects + 1,
+                }
+                for index, code in enumerate(codes)
+            ],
+        )
+        # Fresh tables, so ids are assigned in insertion order from 1
+        connection.execute(
+            insert(Semester),
+            [
+                {"student_id": student + 1, "semester": semester + 1, "gpa": 8.0}
+                for student in range(students)
+                for semester in range(semesters)
+            ],
+        )
+        connection.execute(
+            insert(Grade),
+            [
+                {
+                    "semester_id": int(semester_id) + 1,
+                    "subject_id": row % len(codes) + 1,
+                    "grade": str(grade),
+                    "grade_points_earned": grade_points_earned(grade, 3),
+                }
+                for row, (semester_id, grade) in enumerate(
+                    zip(cohort["semester_id"], original)
+                )
+            ],
+        )
+        connection.execute(
+            insert(GradeChange),
+            [
+                {
+                    "regno": regnos[cohort["student_id"][row]],
+                    "subject_code": codes[row % len(codes)],
+                    "semester": int(row) % len(codes) // subjects + 1,
+                    "original_grade": str(original[row]),
+                    "new_grade": str(cohort["grade"][row]),
+                    "credits": 3,
+                }
+                for row in changed
+            ],
+        )
+
+
+def time_recompute(args):
+    """Seconds to load the grades with overlays, and to recompute and write"""
+    cohort = build_cohort(
+        args.db_students, args.semesters, args.subjects, args.change_rate
+    )
+    start = time.perf_counter()
+    seed_database(cohort, args.semesters, args.subjects)
+    rows = len(cohort["credits"])
+    print(
+        f"🗄️  Seeded {args.db_students:,} students, {rows:,} graded subjects and "
+        f"{cohort['changes']:,} grade changes ({time.perf_counter() - start:.2f}s)"
+    )
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        arrays = load_grade_arrays(db)
+        load_s = time.perf_counter() - start
+        assert int(arrays["overlaid"].sum()) == cohort["changes"]
+
+        start = time.perf_counter()
+        result = recompute_gpas(db)
+        db.commit()
+        recompute_s = time.perf_counter() - start
+    finally:
+        db.close()
+        engine.dispose()
+        SCRATCH_DB.unlink(missing_ok=True)
+
+    print(f"📥 Load + overlay:   {load_s:.3f}s ({rows / load_s:,.0f} rows/s)")
+    print(
+        f"🔁 recompute_gpas:   {recompute_s:.3f}s ({rows / recompute_s:,.0f} rows/s, "
+        f"{result['updated']:,} adjusted GPAs written)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--semesters", type=int, default=8)
+    parser.add_argument("--subjects", type=int, default=6)
+    parser.add_argument("--change-rate", type=float, default=0.02)
+    parser.add_argument(
+        "--db-students",
+        type=int,
+        default=10_000,
+        help="cohort size for the database run (0 = skip it)",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cohort = build_cohort(args.students, args.semesters, args.subjects, args.change_rate)
+    rows = len(cohort["credits"])
+    print(
+        f"🧱 {args.students:,} students, {rows:,} graded subjects, "
+        f"{cohort['changes']:,} grade changes ({time.perf_counter() - start:.2f}s)"
+    )
+
+    start = time.perf_counter()
+    loop_semester_gpa, loop_cgpa = python_loop(cohort)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    semester_gpa, cgpa = vectorized(cohort)
+    numpy_s = time.perf_counter() - start
+
+    assert np.allclose(semester_gpa, [loop_semester_gpa[k] for k in sorted(loop_semester_gpa)])
+    assert np.allclose(cgpa, [loop_cgpa[k] for k in sorted(loop_cgpa)])
+
+    print(f"🐍 Python loop: {loop_s:.3f}s ({rows / loop_s:,.0f} rows/s)")
+    print(f"🚀 NumPy:       {numpy_s:.3f}s ({rows / numpy_s:,.0f} rows/s)")
+    print(f"⚡ Speedup:     {loop_s / numpy_s:.1f}x")
+
+    if args.db_students:
+        time_recompute(args)
+
+
+if __name__ == "__main__":
+    main()
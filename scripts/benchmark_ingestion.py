@@ -0,0 +1,169 @@
+"""
+Benchmark - Serial vs process-pool PDF parsing throughput
+
+Writes a synthetic corpus of result PDFs (same text layout as the real ones,
+including arrears) with PyMuPDF, then times PDFProcessor.parse_pdf over it
+serially and through the same process pool process_all_pdfs uses.
+
+With --writes it also ingests the corpus into a scratch SQLite database
+(never the configured one; uploads are skipped) and reports the SQL
+statements issued per PDF.
+
+Usage:
+    python scripts/benchmark_ingestion.py --pdfs 500 --workers 4 --writes
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fitz
+from sqlalchemy import event
+
+# Writes go to a scratch SQLite database, never to the configured one
+SCRATCH_DB = Path(tempfile.gettempdir()) / "benchmark_ingestion.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DB}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pdf_processor  # noqa: E402
+from database import Base, engine  # noqa: E402
+from pdf_processor import PDFProcessor, _init_parse_worker, _parse_in_worker  # noqa: E402
+
+EXAMS = {1: "MARCH 2023", 2: "JUL 23", 3: "November 2023", 4: "MAY 2024"}
+GRADES = ["O", "A+", "A", "B+", "B", "C", "U"]
+WORDS = ["Data", "Structures", "Engineering", "Mathematics", "Physics", "Design"]
+
+
+def write_result_pdf(path: Path, regno: str, semester: int, rng: random.Random):
+    """One result PDF whose extracted text matches the real layout"""
+    lines = [
+        "VELAMMAL ENGINEERING COLLEGE",
+        f"Provisional Results for {EXAMS[semester]} Examinations",
+        f"Register Number : {regno}",
+        "Name : " + " ".join(rng.choice(WORDS).upper() for _ in range(2)),
+        f"D.O.B : {rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2004",
+        "S.No",
+        "Semester",
+        "Subject Code with Name",
+        "Grade",
+    ]
+    rows = [(semester, index) for index in range(rng.randint(6, 9))]
+    # Arrears: re-taken subjects from earlier semesters
+    rows += [
+        (rng.randint(1, semester - 1), rng.randint(0, 5))
+        for _ in range(rng.randint(0, 3) if semester > 1 else 0)
+    ]
+    for number, (sub_semester, index) in enumerate(rows, start=1):
+        code = f"21CS{sub_semester}{index:02d}T"
+        lines += [
+            str(number),
+            str(sub_semester),
+            f"{code} - {rng.choice(WORDS)} {rng.choice(WORDS)}",
+            rng.choice(GRADES),
+        ]
+    lines.append(f"GPA for the Semester : {semester} => {rng.uniform(5, 10):.2f}")
+
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 50
+    for line in lines:
+        if y > page.rect.height - 40:
+            page = doc.new_page()
+            y = 50
+        page.insert_text((50, y), line, fontsize=10)
+        y += 14
+    doc.save(path)
+    doc.close()
+
+
+def build_corpus(directory: Path, count: int, seed: int = 7):
+    """
+    Write `count` synthetic result PDFs into directory, one per semester for
+    each student, in semester order
+    """
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        regno = f"1132220{index // len(EXAMS):05d}"
+        semester = index % len(EXAMS) + 1
+        path = directory / f"{regno}_sem{semester}.pdf"
+        write_result_pdf(path, regno, semester, rng)
+        paths.append(path)
+    return paths
+
+
+def measure_writes(paths):
+    """Ingest paths into a fresh scratch database, counting statements"""
+    engine.dispose()
+    SCRATCH_DB.unlink(missing_ok=True)
+    Base.metadata.create_all(engine)
+    pdf_processor.upload_pdf = lambda _path, storage_path: storage_path
+
+    processor = PDFProcessor(worker=True)
+    statements = 0
+
+    def count_statement(*_args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    start = time.perf_counter()
+    for path in paths:
+        processor.write_pdf(processor.parse_pdf(path))
+    elapsed = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", count_statement)
+
+    failed = [m for m in processor.messages if m.startswith("❌")]
+    print(
+        f"🧮 Writes: {statements / len(paths):.1f} SQL statements per PDF, "
+        f"{len(paths) / elapsed:.1f} PDFs/s end to end"
+    )
+    if failed:
+        print(f"⚠️  {len(failed)} PDFs failed, first: {failed[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdfs", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--writes", action="store_true", help="also measure DB writes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🧱 Writing {args.pdfs} synthetic PDFs...")
+        paths = build_corpus(Path(tmp), args.pdfs)
+
+        processor = PDFProcessor(worker=True)
+        start = time.perf_counter()
+        serial = [processor.parse_pdf(path) for path in paths]
+        serial_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(args.workers, initializer=_init_parse_worker) as pool:
+            pooled = list(pool.map(_parse_in_worker, paths, chunksize=4))
+        pooled_s = time.perf_counter() - start
+
+        assert [p["subjects"] for p in serial] == [p["subjects"] for p in pooled]
+        failed = sum(1 for p in serial if p["error"])
+
+        print(f"🐢 Serial:          {serial_s:.2f}s ({len(paths) / serial_s:.1f} PDFs/s)")
+        print(
+            f"🚀 {args.workers} worker pool:  {pooled_s:.2f}s "
+            f"({len(paths) / pooled_s:.1f} PDFs/s, {serial_s / pooled_s:.1f}x)"
+        )
+        if failed:
+            print(f"⚠️  {failed} PDFs did not parse")
+
+        if args.writes:
+            measure_writes(paths)
+
+
+if __name__ == "__main__":
+    main()
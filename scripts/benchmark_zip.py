@@ -0,0 +1,156 @@
+"""
+Benchmark - Compare the in-memory, streaming and concurrent ZIP bundle paths
+
+Each mode runs in its own subprocess so peak RSS is measured in isolation.
+Storage is a local fake that returns random (incompressible) bytes after a
+fixed per-object latency, so no storage credentials are needed.
+
+Modes:
+    buffered   - original: sequential downloads, DEFLATE into a BytesIO
+    streaming  - sequential downloads, STORED entries streamed as they arrive
+    concurrent - concurrent downloads (capped), streamed in semester order
+
+Usage:
+    python scripts/benchmark_zip.py --semesters 8 --pdf-kb 2048 --latency-ms 50
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.zip_stream import iter_zip, iter_fetched  # noqa: E402
+
+MODES = ("buffered", "streaming", "concurrent")
+
+
+class FakeStorage:
+    """Local stand-in for Supabase Storage that injects download latency"""
+
+    def __init__(self, pdf_bytes: int, latency: float):
+        self.pdf_bytes = pdf_bytes
+        self.latency = latency
+
+    def download(self, storage_path: str) -> bytes:
+        time.sleep(self.latency)
+        return os.urandom(self.pdf_bytes)
+
+
+def storage_paths(semesters: int):
+    return [f"000000000000/000000000000_sem{sem}.pdf" for sem in range(1, semesters + 1)]
+
+
+def sequential_entries(paths, storage):
+    """Yield (filename, bytes) pairs, downloading one object at a time"""
+    for path in paths:
+        yield path.rsplit("/", 1)[-1], storage.download(path)
+
+
+def concurrent_entries(paths, storage, concurrency: int):
+    """Yield (filename, bytes) pairs, downloading up to concurrency at once"""
+    for path, content, _error in iter_fetched(
+        paths, storage.download, max_workers=concurrency
+    ):
+        yield path.rsplit("/", 1)[-1], content
+
+
+def run_buffered(entries, consume):
+    """Previous implementation: DEFLATE into a BytesIO, then copy it out"""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for filename, content in entries:
+            zip_file.writestr(filename, content)
+    zip_buffer.seek(0)
+    consume(zip_buffer.getvalue())
+
+
+def run_streaming(entries, consume):
+    """Current implementation: STORED entries yielded as they arrive"""
+    for chunk in iter_zip(entries):
+        consume(chunk)
+
+
+def run_mode(mode: str, args) -> dict:
+    """Run one mode in this process and report its measurements"""
+    baseline_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    state = {"first_byte": None, "total_bytes": 0}
+
+    def consume(chunk):
+        if state["first_byte"] is None:
+            state["first_byte"] = time.perf_counter()
+        state["total_bytes"] += len(chunk)
+
+    storage = FakeStorage(args.pdf_kb * 1024, args.latency_ms / 1000)
+    paths = storage_paths(args.semesters)
+    if mode == "buffered":
+        runner, entries = run_buffered, sequential_entries(paths, storage)
+    elif mode == "streaming":
+        runner, entries = run_streaming, sequential_entries(paths, storage)
+    else:
+        runner = run_streaming
+        entries = concurrent_entries(paths, storage, args.concurrency)
+
+    start = time.perf_counter()
+    runner(entries, consume)
+    end = time.perf_counter()
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "ttfb_ms": round((state["first_byte"] - start) * 1000, 1),
+        "total_ms": round((end - start) * 1000, 1),
+        "archive_mb": round(state["total_bytes"] / 1024 / 1024, 2),
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1),
+        "rss_growth_mb": round((peak_rss_kb - baseline_rss_kb) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--semesters", type=int, default=8)
+    parser.add_argument("--pdf-kb", type=int, default=2048)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    print(
+        f"📦 {args.semesters} PDFs × {args.pdf_kb} KB, "
+        f"{args.latency_ms:.0f} ms simulated latency per download, "
+        f"concurrency {args.concurrency}\n"
+    )
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode]
+            + ["--semesters", str(args.semesters)]
+            + ["--pdf-kb", str(args.pdf_kb)]
+            + ["--latency-ms", str(args.latency_ms)]
+            + ["--concurrency", str(args.concurrency)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"{result['mode']:>10}: TTFB {result['ttfb_ms']:>8} ms | "
+            f"total {result['total_ms']:>8} ms | "
+            f"RSS growth {result['rss_growth_mb']:>6} MB "
+            f"(peak {result['peak_rss_mb']} MB) | "
+            f"archive {result['archive_mb']} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
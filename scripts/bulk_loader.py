@@ -0,0 +1,336 @@
+"""
+Bulk Loader - Two-phase PDF ingestion for initial cohort loads
+
+Phase 1 (stage) parses every PDF into a staging directory of CSV files,
+without touching the database. Phase 2 (load) COPYs the staging files into
+temporary tables on PostgreSQL and merges them into the app tables with a
+handful of set-based statements in one transaction, then uploads the PDFs of
+the newly loaded semesters. Those uploads are journaled in the upload failure
+queue before the commit, so pdf_uploader.py --replay finishes them after a
+crash.
+
+The staging directory can be inspected, kept and loaded again: every merge is
+an upsert, so replaying it only fills in what is missing.
+
+Usage:
+    python scripts/bulk_loader.py stage --folder results/ --staging staging/
+    python scripts/bulk_loader.py load --staging staging/
+    python scripts/bulk_loader.py all --folder results/ --staging staging/
+"""
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from database import engine
+from grading import GRADE_POINTS
+from cohort_stats import refresh_cohort_stats
+from pdf_processor import PDFProcessor, _init_parse_worker, _parse_in_worker
+from pdf_uploader import BulkUploader, format_report
+
+# Staging file -> columns, in COPY order. seq is the PDF's position in the
+# run; line is a subject line's position within its PDF.
+STAGING_FILES = {
+    "students": ["seq", "regno", "name", "dob"],
+    "subjects": ["seq", "code", "name", "credits", "semester"],
+    "semesters": ["seq", "regno", "semester", "gpa", "pdf_path"],
+    "grades": [
+        "seq",
+        "line",
+        "regno",
+        "exam_semester",
+        "sub_semester",
+        "code",
+        "grade",
+        "points",
+    ],
+}
+
+STAGING_TABLES = """
+CREATE TEMP TABLE stage_students (
+    seq integer, regno text, name text, dob text
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_subjects (
+    seq integer, code text, name text, credits integer, semester integer
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_semesters (
+    seq integer, regno text, semester integer, gpa numeric(4, 2), pdf_path text
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_grades (
+    seq integer, line integer, regno text, exam_semester integer,
+    sub_semester integer, code text, grade text, points integer
+) ON COMMIT DROP;
+CREATE TEMP TABLE loaded_semesters (
+    id integer, student_id integer, semester integer
+) ON COMMIT DROP;
+"""
+
+# The first PDF naming a student or subject wins, as in the serial path
+MERGE_STUDENTS = """
+INSERT INTO students (regno, name, dob)
+SELECT DISTINCT ON (regno) regno, name, dob
+FROM stage_students
+ORDER BY regno, seq
+ON CONFLICT (regno) DO NOTHING
+"""
+
+MERGE_SUBJECTS = """
+INSERT INTO subjects (code, name, credits, semester)
+SELECT DISTINCT ON (code) code, name, credits, semester
+FROM stage_subjects
+ORDER BY code, seq
+ON CONFLICT (code) DO NOTHING
+"""
+
+# Semesters already in the database are duplicates and contribute nothing
+MERGE_SEMESTERS = """
+WITH inserted AS (
+    INSERT INTO semesters (student_id, semester, gpa)
+    SELECT DISTINCT ON (st.id, ss.semester) st.id, ss.semester, ss.gpa
+    FROM stage_semesters ss
+    JOIN students st ON st.regno = ss.regno
+    ORDER BY st.id, ss.semester, ss.seq
+    ON CONFLICT (student_id, semester) DO NOTHING
+    RETURNING id, student_id, semester
+)
+INSERT INTO loaded_semesters SELECT id, student_id, semester FROM inserted
+"""
+
+# PDFs whose semester this load inserted; a re-staged copy of the same
+# semester keeps only its first PDF
+LOADED_PDFS = """
+SELECT DISTINCT ON (ls.id)
+    ss.seq, ls.id, ls.student_id, ss.regno, ss.semester, ss.pdf_path
+FROM loaded_semesters ls
+JOIN students st ON st.id = ls.student_id
+JOIN stage_semesters ss ON ss.regno = st.regno AND ss.semester = ls.semester
+ORDER BY ls.id, ss.seq
+"""
+
+# Current grades and arrears from the loaded PDFs in one upsert. Arrears
+# land in the student's original semester; when several PDFs grade the same
+# subject in the same semester, the latest exam wins.
+MERGE_GRADES = """
+INSERT INTO grades (semester_id, subject_id, grade, grade_points_earned)
+SELECT DISTINCT ON (target.id, sub.id)
+    target.id, sub.id, g.grade, g.points * sub.credits
+FROM stage_grades g
+JOIN loaded_pdfs lp ON lp.seq = g.seq
+JOIN semesters target
+    ON target.student_id = lp.student_id AND target.semester = g.sub_semester
+JOIN subjects sub ON sub.code = g.code
+ORDER BY target.id, sub.id, g.exam_semester DESC, g.seq DESC, g.line DESC
+ON CONFLICT (semester_id, subject_id) DO UPDATE
+SET grade = EXCLUDED.grade, grade_points_earned = EXCLUDED.grade_points_earned
+"""
+
+
+def stage_pdfs(
+    processor: PDFProcessor, pdf_files, staging_dir: Path, workers: int = 0
+):
+    """
+    Parse pdf_files into the CSV files of staging_dir
+
+    Returns:
+        Number of rows written per staging file
+    """
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    counts = dict.fromkeys(STAGING_FILES, 0)
+    staged_subjects = set()
+
+    with ExitStack() as stack:
+        writers = {}
+        for name, columns in STAGING_FILES.items():
+            f = stack.enter_context(
+                open(staging_dir / f"{name}.csv", "w", newline="", encoding="utf-8")
+            )
+            writers[name] = csv.writer(f)
+            writers[name].writerow(columns)
+
+        def write(name, row):
+            writers[name].writerow(row)
+            counts[name] += 1
+
+        if workers > 0:
+            pool = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_parse_worker,
+                    initargs=(processor.targeted,),
+                )
+            )
+            results = pool.map(_parse_in_worker, pdf_files, chunksize=4)
+        else:
+            results = map(processor.parse_pdf, pdf_files)
+
+        for seq, parsed in enumerate(results):
+            for message in parsed["log"]:
+                processor.log(message)
+            if parsed["error"]:
+                processor.log(parsed["error"])
+                continue
+
+            regno, semester = parsed["regno"], parsed["semester"]
+            if parsed["name"] and parsed["dob"]:
+                write("students", [seq, regno, parsed["name"], parsed["dob"]])
+            write(
+                "semesters",
+                [seq, regno, semester, parsed["gpa"], str(parsed["path"])],
+            )
+            for line, (sub_semester, code, name, grade) in enumerate(
+                parsed["subjects"]
+            ):
+                if code not in staged_subjects:
+                    staged_subjects.add(code)
+                    credits = processor.get_subject_credits(code)
+                    write("subjects", [seq, code, name.strip(), credits, sub_semester])
+                write(
+                    "grades",
+                    [
+                        seq,
+                        line,
+                        regno,
+                        semester,
+                        sub_semester,
+                        code,
+                        grade,
+                        GRADE_POINTS.get(grade, 0),
+                    ],
+                )
+    return counts
+
+
+def load_staging(staging_dir: Path, before_commit=None):
+    """
+    COPY staging_dir into temporary tables and merge them into the app tables
+    in one transaction (PostgreSQL only)
+
+    before_commit, if given, is called with the loaded PDFs just before the
+    commit, e.g. to journal their uploads so a crash cannot lose them.
+
+    Returns:
+        (rows merged per table, loaded PDFs as (regno, semester, pdf_path))
+    """
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError(
+            "COPY loading needs PostgreSQL; use pdf_processor.py instead"
+        )
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(STAGING_TABLES)
+        for name, columns in STAGING_FILES.items():
+            with open(staging_dir / f"{name}.csv", "r", encoding="utf-8") as f:
+                cursor.copy_expert(
+                    f"COPY stage_{name} ({', '.join(columns)}) "
+                    "FROM STDIN WITH (FORMAT csv, HEADER true)",
+                    f,
+                )
+
+        merged = {}
+        cursor.execute(MERGE_STUDENTS)
+        merged["students"] = cursor.rowcount
+        cursor.execute(MERGE_SUBJECTS)
+        merged["subjects"] = cursor.rowcount
+        cursor.execute(MERGE_SEMESTERS)
+        merged["semesters"] = cursor.rowcount
+        cursor.execute(f"CREATE TEMP TABLE loaded_pdfs ON COMMIT DROP AS {LOADED_PDFS}")
+        cursor.execute("SELECT regno, semester, pdf_path FROM loaded_pdfs")
+        loaded = cursor.fetchall()
+        cursor.execute(MERGE_GRADES)
+        merged["grades"] = cursor.rowcount
+
+        if before_commit is not None:
+            before_commit(loaded)
+        connection.commit()
+        return merged, loaded
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def storage_path(regno: str, semester: int) -> str:
+    return f"{regno}/{regno}_sem{semester}.pdf"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-phase bulk PDF loader")
+    parser.add_argument("phase", choices=["stage", "load", "all"])
+    parser.add_argument("--folder", type=Path, help="override the PDF folder")
+    parser.add_argument("--staging", type=Path, default=Path("staging"))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) - 1),
+        help="parse worker processes (0 = parse in this process)",
+    )
+    parser.add_argument("--upload-workers", type=int, default=4)
+    parser.add_argument(
+        "--upload-failures",
+        type=Path,
+        default=Path("logs") / "upload_failures.jsonl",
+        help="queue of uploads that failed every retry, for pdf_uploader.py --replay",
+    )
+    parser.add_argument(
+        "--no-upload", action="store_true", help="load the database without uploading"
+    )
+    args = parser.parse_args()
+
+    processor = PDFProcessor()
+    if args.folder:
+        processor.pdf_folder = args.folder
+
+    if args.phase in ("stage", "all"):
+        pdf_files = sorted(processor.pdf_folder.rglob("*.pdf"))
+        processor.log(f"📊 Staging {len(pdf_files)} PDF files into {args.staging}")
+        started = time.perf_counter()
+        counts = stage_pdfs(processor, pdf_files, args.staging, args.workers)
+        processor.log(
+            f"📦 Staged in {time.perf_counter() - started:.1f}s: "
+            + ", ".join(f"{name} {count}" for name, count in counts.items())
+        )
+
+    if args.phase in ("load", "all"):
+        uploader = None
+        if not args.no_upload:
+            uploader = BulkUploader(
+                workers=args.upload_workers, failure_queue=args.upload_failures
+            )
+
+        def journal_uploads(loaded):
+            # Only semesters this load inserts get uploads; after the commit a
+            # rerun sees them as existing, so the journal must come first
+            if uploader is not None:
+                uploader.journal(
+                    (pdf_path, storage_path(regno, semester))
+                    for regno, semester, pdf_path in loaded
+                )
+
+        started = time.perf_counter()
+        try:
+            merged, loaded = load_staging(args.staging, before_commit=journal_uploads)
+            processor.log(
+                f"🐘 Loaded in {time.perf_counter() - started:.1f}s: "
+                + ", ".join(f"{name} {count}" for name, count in merged.items())
+            )
+            if uploader is not None:
+                for regno, semester, pdf_path in loaded:
+                    uploader.submit(
+                        pdf_path, storage_path(regno, semester), journal=False
+                    )
+        finally:
+            if uploader is not None:
+                processor.log(format_report(uploader.close()))
+
+        # Ranks and distributions now include the new results
+        refresh_cohort_stats()
+
+
+if __name__ == "__main__":
+    main()
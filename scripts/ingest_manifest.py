@@ -0,0 +1,164 @@
+"""
+Ingest Manifest - Remember which PDFs were ingested and how it went
+Lets re-runs skip unchanged files without opening them and resume after an
+interruption
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# Outcomes that re-processing the same bytes would not change. Unparseable
+# is only final while the parser configuration stays the same.
+FINAL_OUTCOMES = {"processed", "duplicate", "unparseable"}
+# Outcomes --retry-failed picks up again
+RETRY_OUTCOMES = {"failed", "missing_student"}
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Append-only JSON Lines record of ingested PDFs
+
+    Each line holds a PDF's path, size, mtime, sha256, outcome and the
+    fingerprint of the parser configuration it was processed with. The last
+    line for a path wins. A line is appended as soon as a PDF is written, so
+    an interrupted run resumes from where it stopped.
+
+    Outcomes:
+        processed       - semester and grades stored
+        duplicate       - the semester was already in the database
+        unparseable     - required fields could not be extracted; retried
+                          once the parser fingerprint changes
+        missing_student - no name or DOB in the PDF and the student is not
+                          stored yet (an earlier semester's PDF adds them);
+                          retried on the next run
+        failed          - an error occurred; retried on the next run
+    """
+
+    def __init__(self, path: Path, parser: str = None):
+        self.path = Path(path)
+        self.parser = parser  # See PDFProcessor.parser_fingerprint
+        self.entries = {}  # str(path) -> latest entry
+        self._fingerprints = {}  # str(path) -> (size, mtime_ns, sha256)
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+
+        lines = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by an interrupted run
+                self.entries[entry["path"]] = entry
+                lines += 1
+
+        if lines > 2 * len(self.entries) + 100:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the manifest with only the latest entry per path"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _is_final(self, entry) -> bool:
+        """Whether processing the entry's bytes again would change nothing"""
+        if entry["outcome"] == "unparseable":
+            return entry.get("parser") == self.parser
+        return entry["outcome"] in FINAL_OUTCOMES
+
+    def pending(self, pdf_files, retry_failed: bool = False):
+        """
+        Pick the PDFs that need processing
+
+        Files whose size and mtime match a final outcome are skipped without
+        being opened. Files that changed on disk are hashed, and skipped if
+        their content already reached a final outcome under any path.
+
+        Args:
+            pdf_files: Candidate PDF paths
+            retry_failed: Only return files whose last outcome was "failed"
+                or "missing_student"
+
+        Returns:
+            (pending paths, number skipped)
+        """
+        final_hashes = {
+            entry["sha256"]: entry["outcome"]
+            for entry in self.entries.values()
+            if self._is_final(entry)
+        }
+
+        pending = []
+        skipped = 0
+        for pdf_path in pdf_files:
+            key = str(pdf_path)
+            entry = self.entries.get(key)
+            if retry_failed and (
+                entry is None or entry["outcome"] not in RETRY_OUTCOMES
+            ):
+                skipped += 1
+                continue
+
+            stat = pdf_path.stat()
+            if (
+                not retry_failed
+                and entry is not None
+                and self._is_final(entry)
+                and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns
+            ):
+                skipped += 1
+                continue
+
+            sha256 = file_sha256(pdf_path)
+            self._fingerprints[key] = (stat.st_size, stat.st_mtime_ns, sha256)
+            if not retry_failed and sha256 in final_hashes:
+                # Same bytes as a finished file (touched, moved or copied)
+                self.record(pdf_path, final_hashes[sha256])
+                skipped += 1
+                continue
+
+            pending.append(pdf_path)
+        return pending, skipped
+
+    def record(self, pdf_path: Path, outcome: str):
+        """Append the outcome for a PDF returned by pending()"""
+        key = str(pdf_path)
+        fingerprint = self._fingerprints.get(key)
+        if fingerprint is None:
+            stat = pdf_path.stat()
+            fingerprint = (stat.st_size, stat.st_mtime_ns, file_sha256(pdf_path))
+        size, mtime_ns, sha256 = fingerprint
+
+        entry = {
+            "path": key,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": sha256,
+            "outcome": outcome,
+            "parser": self.parser,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.entries[key] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
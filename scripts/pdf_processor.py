@@ -3,14 +3,23 @@ PDF Processor - Extract grades from PDFs and store in database
 This processes PDFs and uploads them to Supabase Storage
 """
 
+import argparse
+import hashlib
+import os
 import re
+import time
 import fitz  # PyMuPDF
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 import logging
 from datetime import datetime
 import json
 from database import (
+    engine,
     SessionLocal,
     Student,
     Subject,
@@ -18,15 +27,29 @@ from database import (
     Grade,
     upload_pdf,
 )
+from grading import grade_points_earned
+from cohort_stats import refresh_cohort_stats
+from ingest_manifest import IngestManifest
+from pdf_uploader import BulkUploader, format_report, outstanding_uploads
 
+# Plain text only: no ligature/whitespace preservation, images or span data
+TEXT_FLAGS = fitz.TEXT_MEDIABOX_CLIP
 
-class PDFProcessor:
-    def __init__(self):
-        # Setup logging
-        self.setup_logging()
 
-        # Load subjects data from JSON file
-        self.load_subjects_data()
+class PDFProcessor:
+    def __init__(self, worker: bool = False, targeted: bool = True):
+        # Parse-only instances in pool processes collect their log messages
+        # and hand them back with the parse result instead of logging
+        self.messages = [] if worker else None
+        self.subject_cache = None  # code -> (id, credits), loaded on first write
+        self.subjects_data = {}
+        self.targeted = targeted  # See extract_pdf_text
+        if not worker:
+            # Setup logging
+            self.setup_logging()
+
+            # Load subjects data from JSON file
+            self.load_subjects_data()
 
         # Hardcoded folder path for downloaded PDFs
         self.pdf_folder = Path(r"d:\Documents\results\results")
@@ -40,19 +63,6 @@ class PDFProcessor:
             # TODO: Add more mappings as you encounter new exam dates
         }
 
-        self.grade_points = {
-            "O": 10,
-            "A+": 9,
-            "A": 8,
-            "B+": 7,
-            "B": 6,
-            "C": 5,
-            "U": 0,
-            "RA": 0,
-            "AB": 0,
-            "NA": 0,
-        }
-
         # Regex to extract 12-digit registration number
         self.reg_pattern = re.compile(r"\d{12}")
 
@@ -60,6 +70,36 @@ class PDFProcessor:
             r"(\d)\s*(2[123][A-Z]{2,3}\d{2,3}[TL])\s*(?:-\s|\s)([A-Za-z,\s]+)\s(A\+?|B\+?|C|O|U|AB|NA)\s",
             re.IGNORECASE,
         )
+        self.gpa_pattern = re.compile(r"=> (.*)")
+        self.name_pattern = re.compile(r"Name\s: ([A-Za-z ]*)")
+        self.dob_pattern = re.compile(r"D\.O\.B : (\d{2}-\d{2}-\d{4})")
+        self.exam_date_pattern = re.compile(
+            r"Provisional Results for ([A-Za-z]* \d*) Examinations", re.IGNORECASE
+        )
+
+    def parser_fingerprint(self) -> str:
+        """
+        Short hash of everything that decides whether a PDF parses: the exam
+        date map, the patterns and the extraction mode
+
+        The manifest stores it with unparseable PDFs, so they are tried again
+        once any of these change.
+        """
+        patterns = [
+            pattern.pattern
+            for pattern in (
+                self.reg_pattern,
+                self.subject_regex,
+                self.gpa_pattern,
+                self.name_pattern,
+                self.dob_pattern,
+                self.exam_date_pattern,
+            )
+        ]
+        config = json.dumps(
+            [self.exam_semester_map, patterns, self.targeted], sort_keys=True
+        )
+        return hashlib.sha256(config.encode("utf-8")).hexdigest()[:16]
 
     def setup_logging(self):
         """Setup logging to both console and file"""
@@ -105,13 +145,15 @@ class PDFProcessor:
 
     def log(self, message):
         """Log message to both console and file"""
+        if self.messages is not None:
+            self.messages.append(message)
+            return
         self.logger.info(message)
 
     def extract_gpa(self, text: str):
         """Extract GPA from PDF text"""
-        gpa_pattern = r"=> (.*)"
         try:
-            match = re.search(gpa_pattern, text)
+            match = self.gpa_pattern.search(text)
             if match:
                 return float(match.group(1).strip())
         except Exception:
@@ -120,9 +162,8 @@ class PDFProcessor:
 
     def extract_name(self, text: str):
         """Extract student name from PDF text"""
-        name_pattern = r"Name\s: ([A-Za-z ]*)"
         try:
-            match = re.search(name_pattern, text)
+            match = self.name_pattern.search(text)
             if match:
                 return match.group(1).title()
         except Exception:
@@ -143,8 +184,7 @@ class PDFProcessor:
         """Extract semester number from exam date in PDF text"""
         try:
             # Look for exam date pattern like "Provisional Results for NOV 2024 Examinations"
-            exam_date_pattern = r"Provisional Results for ([A-Za-z]* \d*) Examinations"
-            match = re.search(exam_date_pattern, text, re.IGNORECASE)
+            match = self.exam_date_pattern.search(text)
 
             if match:
                 exam_date = match.group(1)  # e.g., "NOV 2024"
@@ -162,9 +202,8 @@ class PDFProcessor:
 
     def extract_dob(self, text: str):
         """Extract student date of birth from PDF text"""
-        dob_pattern = r"D\.O\.B : (\d{2}-\d{2}-\d{4})"
         try:
-            match = re.search(dob_pattern, text)
+            match = self.dob_pattern.search(text)
             if match:
                 return match.group(1).strip()
         except Exception:
@@ -172,32 +211,93 @@ class PDFProcessor:
         return None
 
     def extract_pdf_text(self, pdf_path: Path):
-        """Extract all text from PDF once"""
+        """
+        Extract the PDF's text once
+
+        In targeted mode pages are extracted with minimal text flags and
+        reading stops after the page holding the GPA line, the last field
+        parsed, so trailing pages (legends, notes) are never laid out.
+        """
         try:
             with fitz.open(pdf_path) as doc:
-                return "\n".join(page.get_text() for page in doc)
+                if not self.targeted:
+                    return "\n".join(page.get_text() for page in doc)
+
+                pages = []
+                for page in doc:
+                    pages.append(page.get_text("text", flags=TEXT_FLAGS))
+                    if self.gpa_pattern.search(pages[-1]):
+                        break
+                return "\n".join(pages)
         except Exception as e:
             self.log(f"❌ Error reading PDF {pdf_path.name}: {e}")
             return None
 
-    def get_or_create_subject(
-        self, db: Session, code: str, name: str, credits: int, semester: int
-    ):
-        """Get existing subject or create new one"""
-        # First try to find by code
-        subject = db.query(Subject).filter(Subject.code == code).first()
-
-        if not subject:
-            # Create new subject
-            subject = Subject(
-                code=code, name=name.strip(), credits=credits, semester=semester
-            )
-            db.add(subject)
-            db.commit()
-            db.refresh(subject)
-            self.log(f"➕ Added new subject: {code} - {name}")
-
-        return subject
+    def insert(self, model):
+        """INSERT supporting ON CONFLICT for the database in use"""
+        if engine.dialect.name == "postgresql":
+            return postgresql.insert(model)
+        return sqlite.insert(model)
+
+    def resolve_subjects(self, db: Session, matches):
+        """
+        Map each subject code in matches to (id, credits)
+
+        Codes come from the preloaded cache; subjects seen for the first time
+        are inserted together in one upsert.
+        """
+        if self.subject_cache is None:
+            self.subject_cache = {
+                code: (subject_id, credits)
+                for subject_id, code, credits in db.query(
+                    Subject.id, Subject.code, Subject.credits
+                )
+            }
+
+        new_subjects = {}
+        for sub_semester, code, name, _grade in matches:
+            if code not in self.subject_cache and code not in new_subjects:
+                new_subjects[code] = {
+                    "code": code,
+                    "name": name.strip(),
+                    "credits": self.get_subject_credits(code),
+                    "semester": sub_semester,
+                }
+
+        if new_subjects:
+            stmt = self.insert(Subject).values(list(new_subjects.values()))
+            # A no-op update makes RETURNING yield ids for existing codes too
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["code"], set_={"code": stmt.excluded.code}
+            ).returning(Subject.id, Subject.code, Subject.credits)
+            for subject_id, code, credits in db.execute(stmt):
+                self.subject_cache[code] = (subject_id, credits)
+                self.log(f"➕ Added new subject: {code} - {new_subjects[code]['name']}")
+
+        return self.subject_cache
+
+    def load_arrear_semesters(self, db: Session, student_id: int, semesters):
+        """
+        Load a student's earlier semesters and their grades in one query
+
+        Returns:
+            semester number -> (semester id, {subject_id: grade}) for the
+            requested semesters that exist
+        """
+        if not semesters:
+            return {}
+
+        rows = db.execute(
+            select(Semester.semester, Semester.id, Grade.subject_id, Grade.grade)
+            .outerjoin(Grade, Grade.semester_id == Semester.id)
+            .where(Semester.student_id == student_id, Semester.semester.in_(semesters))
+        )
+        loaded = {}
+        for semester, semester_id, subject_id, grade in rows:
+            _, grades = loaded.setdefault(semester, (semester_id, {}))
+            if subject_id is not None:
+                grades[subject_id] = grade
+        return loaded
 
     def get_subject_credits(self, subject_code: str) -> int:
         """Get credits for a subject from the loaded data, default to 4 if not found"""
@@ -209,174 +309,240 @@ class PDFProcessor:
             )
             return 4
 
-    def process_pdf(self, pdf_path: Path):
-        """Process a single PDF file"""
-        db = SessionLocal()
-        try:
-            self.log(f"📄 Processing: {pdf_path.name}")
-
-            # Extract text once and pass to all functions
-            text = self.extract_pdf_text(pdf_path)
-            if not text:
-                self.log(f"❌ Could not read PDF content from {pdf_path.name}")
-                return
+    def parse_pdf(self, pdf_path: Path) -> dict:
+        """
+        Extract and parse a PDF without touching the database
+
+        Safe to run in a worker process. "error" is set when the PDF cannot
+        be ingested; "log" holds messages collected by worker instances.
+        """
+        parsed = {
+            "path": pdf_path,
+            "error": None,
+            "regno": None,
+            "semester": None,
+            "name": None,
+            "dob": None,
+            "gpa": None,
+            "subjects": [],
+            "log": [],
+        }
 
+        # Extract text once and pass to all functions
+        text = self.extract_pdf_text(pdf_path)
+        if not text:
+            parsed["error"] = f"❌ Could not read PDF content from {pdf_path.name}"
+        else:
             # Extract basic info
-            regno = self.extract_regno(text)
-            if not regno:
-                self.log(
+            parsed["regno"] = self.extract_regno(text)
+            if not parsed["regno"]:
+                parsed["error"] = (
                     f"⚠️  Could not extract registration number from {pdf_path.name}"
                 )
-                return
+            else:
+                parsed["semester"] = self.extract_semester_number(text)
+                if not parsed["semester"]:
+                    parsed["error"] = (
+                        f"⚠️  Could not extract semester number from {pdf_path.name}"
+                    )
 
-            semester_num = self.extract_semester_number(text)
-            if not semester_num:
-                self.log(f"⚠️  Could not extract semester number from {pdf_path.name}")
-                return
+        if not parsed["error"]:
+            parsed["name"] = self.extract_name(text)
+            parsed["dob"] = self.extract_dob(text)
+            parsed["gpa"] = self.extract_gpa(text)
+            parsed["subjects"] = [
+                (int(sub_semester), code, name, grade)
+                for sub_semester, code, name, grade in self.subject_regex.findall(text)
+            ]
+
+        if self.messages:
+            parsed["log"] = self.messages[:]
+            self.messages.clear()
+        return parsed
+
+    def process_pdf(self, pdf_path: Path, uploader: BulkUploader = None) -> str:
+        """Process a single PDF file, returning its outcome (see write_pdf)"""
+        self.log(f"📄 Processing: {pdf_path.name}")
+        return self.write_pdf(self.parse_pdf(pdf_path), uploader)
+
+    def write_pdf(self, parsed: dict, uploader: BulkUploader = None):
+        """
+        Store a parsed PDF's student, semester and grades, and upload the PDF
+
+        With an uploader the upload is queued on its pool, retried there and
+        recorded in its failure queue, instead of blocking the writer.
+
+        Returns:
+            "processed", "duplicate" (semester already stored), "unparseable",
+            "missing_student" (no name or DOB and the student is not stored
+            yet) or "failed"
+        """
+        for message in parsed["log"]:
+            self.log(message)
+        if parsed["error"]:
+            self.log(parsed["error"])
+            return "unparseable"
+
+        pdf_path = parsed["path"]
+        regno = parsed["regno"]
+        semester_num = parsed["semester"]
 
-            # Get or create student
-            student = db.query(Student).filter(Student.regno == regno).first()
-            if not student:
-                name = self.extract_name(text)
-                if not name:
-                    self.log(f"⚠️  Could not extract student name from {pdf_path.name}")
-                    return
-
-                dob = self.extract_dob(text)
-                if not dob:
-                    self.log(f"⚠️  Could not extract student DOB from {pdf_path.name}")
-                    return
-
-                student = Student(regno=regno, name=name, dob=dob)
-                db.add(student)
-                db.commit()
-                db.refresh(student)
-                self.log(f"➕ Added new student: {regno} - {name} (DOB: {dob})")
-
-            # Check if semester already processed
-            existing_semester = (
-                db.query(Semester)
-                .filter(
-                    Semester.student_id == student.id, Semester.semester == semester_num
+        db = SessionLocal()
+        try:
+            # Everything for this PDF is written in one transaction
+            student_id = None
+            if parsed["name"] and parsed["dob"]:
+                stmt = (
+                    self.insert(Student)
+                    .values(regno=regno, name=parsed["name"], dob=parsed["dob"])
+                    .on_conflict_do_nothing(index_elements=["regno"])
+                    .returning(Student.id)
                 )
-                .first()
+                student_id = db.execute(stmt).scalar()
+                if student_id:
+                    self.log(
+                        f"➕ Added new student: {regno} - {parsed['name']} "
+                        f"(DOB: {parsed['dob']})"
+                    )
+
+            if student_id is None:
+                student_id = db.scalar(select(Student.id).where(Student.regno == regno))
+                if student_id is None:
+                    # Not the parser's fault: a PDF carrying the name and DOB
+                    # (usually an earlier semester) may simply come later
+                    missing = "name" if not parsed["name"] else "DOB"
+                    self.log(
+                        f"⚠️  No student {missing} in {pdf_path.name} and {regno} "
+                        "is not stored yet; will retry"
+                    )
+                    return "missing_student"
+
+            # Create semester record unless this semester was already processed
+            stmt = (
+                self.insert(Semester)
+                .values(student_id=student_id, semester=semester_num, gpa=parsed["gpa"])
+                .on_conflict_do_nothing(index_elements=["student_id", "semester"])
+                .returning(Semester.id)
             )
+            semester_id = db.execute(stmt).scalar()
 
-            if existing_semester:
+            if semester_id is None:
+                db.commit()
                 self.log(f"⏭️  Semester {semester_num} for {regno} already processed")
-                return
+                return "duplicate"
 
-            # Upload PDF to storage with new naming convention
+            # Upload PDF to storage with new naming convention. The uploader
+            # journals it before the commit below, so a crash after the commit
+            # leaves the upload in its failure queue for --replay.
             storage_path = f"{regno}/{regno}_sem{semester_num}.pdf"
-            uploaded_path = upload_pdf(pdf_path, storage_path)
-
-            if not uploaded_path:
-                self.log(f"❌ Failed to upload {regno}_sem{semester_num}.pdf")
-                # Continue processing even if upload fails
-
-            # Extract GPA
-            gpa = self.extract_gpa(text)
-
-            # Create semester record
-            semester_record = Semester(
-                student_id=student.id, semester=semester_num, gpa=gpa
+            if uploader is not None:
+                uploader.submit(pdf_path, storage_path)
+            else:
+                uploaded_path = upload_pdf(pdf_path, storage_path)
+
+                if not uploaded_path:
+                    self.log(f"❌ Failed to upload {regno}_sem{semester_num}.pdf")
+                    # Continue processing even if upload fails
+
+            matches = parsed["subjects"]
+            subjects = self.resolve_subjects(db, matches)
+            arrear_semesters = self.load_arrear_semesters(
+                db,
+                student_id,
+                {sub_semester for sub_semester, *_ in matches} - {semester_num},
             )
-            db.add(semester_record)
-            db.commit()
-            db.refresh(semester_record)
-
-            # Extract and process grades
-            grades_added = 0
-            matches = self.subject_regex.findall(text)
-
-            for match in matches:
-                sub_semester, code, name, grade = match
-                sub_semester = int(sub_semester)
-
-                # Get or create subject
-                credits = self.get_subject_credits(code)  # Get credits from loaded data
-                subject = self.get_or_create_subject(
-                    db, code, name, credits, sub_semester
-                )
+            # (semester_id, subject_id) -> row; a repeated line keeps the last.
+            # Current grades and arrears go out in the same upsert.
+            grade_rows = {}
+            current_grades = 0
+
+            for sub_semester, code, name, grade in matches:
+                subject_id, credits = subjects[code]
+                row = {
+                    "subject_id": subject_id,
+                    "grade": grade,
+                    "grade_points_earned": grade_points_earned(grade, credits),
+                }
 
                 # Handle arrear logic: if subject's semester doesn't match current semester,
                 # update the grade in the original semester
                 if sub_semester != semester_num:
-                    # This is an arrear - find the original semester record
-                    original_semester = (
-                        db.query(Semester)
-                        .filter(
-                            Semester.student_id == student.id,
-                            Semester.semester == sub_semester,
+                    original_semester = arrear_semesters.get(sub_semester)
+                    if original_semester is None:
+                        self.log(
+                            f"⚠️  Original semester {sub_semester} not found for arrear subject {code}"
                         )
-                        .first()
-                    )
+                        continue
 
-                    if original_semester:
-                        # Check if grade already exists
-                        existing_grade = (
-                            db.query(Grade)
-                            .filter(
-                                Grade.semester_id == original_semester.id,
-                                Grade.subject_id == subject.id,
-                            )
-                            .first()
+                    original_semester_id, existing_grades = original_semester
+                    old_grade = existing_grades.get(subject_id)
+                    if old_grade is not None:
+                        self.log(
+                            f"🔄 Updated arrear grade for {code}: {old_grade} → {grade} (Semester {sub_semester})"
                         )
-
-                        if existing_grade:
-                            # Update existing grade
-                            old_grade = existing_grade.grade
-                            existing_grade.grade = grade
-                            existing_grade.grade_points_earned = (
-                                subject.credits * self.grade_points.get(grade, 0)
-                            )
-                            self.log(
-                                f"🔄 Updated arrear grade for {code}: {old_grade} → {grade} (Semester {sub_semester})"
-                            )
-                        else:
-                            # Create new grade record in original semester
-                            grade_points_earned = (
-                                subject.credits * self.grade_points.get(grade, 0)
-                            )
-                            new_grade = Grade(
-                                semester_id=original_semester.id,
-                                subject_id=subject.id,
-                                grade=grade,
-                                grade_points_earned=grade_points_earned,
-                            )
-                            db.add(new_grade)
-                            self.log(
-                                f"➕ Added arrear grade for {code}: {grade} (Semester {sub_semester})"
-                            )
                     else:
                         self.log(
-                            f"⚠️  Original semester {sub_semester} not found for arrear subject {code}"
+                            f"➕ Added arrear grade for {code}: {grade} (Semester {sub_semester})"
                         )
+                    existing_grades[subject_id] = grade
+                    row["semester_id"] = original_semester_id
                 else:
                     # Regular subject for current semester
-                    grade_points_earned = subject.credits * self.grade_points.get(
-                        grade, 0
-                    )
-                    new_grade = Grade(
-                        semester_id=semester_record.id,
-                        subject_id=subject.id,
-                        grade=grade,
-                        grade_points_earned=grade_points_earned,
-                    )
-                    db.add(new_grade)
-                    grades_added += 1
+                    row["semester_id"] = semester_id
+                    if (semester_id, subject_id) not in grade_rows:
+                        current_grades += 1
+
+                grade_rows[(row["semester_id"], subject_id)] = row
+
+            if grade_rows:
+                stmt = self.insert(Grade).values(list(grade_rows.values()))
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["semester_id", "subject_id"],
+                    set_={
+                        "grade": stmt.excluded.grade,
+                        "grade_points_earned": stmt.excluded.grade_points_earned,
+                    },
+                )
+                db.execute(stmt)
 
             db.commit()
-            self.log(f"✅ Processed: {regno} sem{semester_num} - {grades_added} grades")
+            self.log(
+                f"✅ Processed: {regno} sem{semester_num} - {current_grades} grades"
+            )
+            return "processed"
 
         except Exception as e:
             db.rollback()
+            # Subjects inserted by the rolled back transaction are gone again
+            self.subject_cache = None
             self.log(f"❌ Error processing {pdf_path.name}: {e}")
+            return "failed"
         finally:
             db.close()
 
-    def process_all_pdfs(self):
-        """Process all PDFs in the folder"""
+    def process_all_pdfs(
+        self,
+        workers: int = 0,
+        upload_workers: int = 4,
+        manifest: IngestManifest = None,
+        retry_failed: bool = False,
+        upload_failures: Path = None,
+    ):
+        """
+        Process all PDFs in the folder
+
+        With workers > 0, text extraction and parsing run in a process pool
+        while this process stays the only database writer, applying PDFs in
+        the same order as the serial path so arrear updates stay correct.
+
+        Uploads run on a pool of upload_workers threads with retries; those
+        that still fail are appended to upload_failures for
+        pdf_uploader.py --replay.
+
+        With a manifest, unchanged PDFs from earlier runs are skipped and each
+        outcome is recorded as it happens; retry_failed processes only the
+        PDFs that failed or found no stored student last time.
+        """
         self.log("🚀 Starting PDF processing...")
         self.log(f"📁 Processing PDFs from: {self.pdf_folder}")
 
@@ -389,18 +555,149 @@ class PDFProcessor:
             self.log(f"⚠️  No PDF files found in {self.pdf_folder}")
             return
 
-        self.log(f"📊 Found {len(pdf_files)} PDF files to process")
+        self.log(f"📊 Found {len(pdf_files)} PDF files")
+
+        self.manifest = manifest
+        self.outcomes = Counter()
+        if manifest is not None:
+            pdf_files, skipped = manifest.pending(pdf_files, retry_failed)
+            self.log(f"📒 Skipping {skipped} PDFs recorded in {manifest.path}")
+            if not pdf_files:
+                self.log("✅ Nothing new to process")
+                return
+        self.log(f"📊 Processing {len(pdf_files)} PDF files")
+
+        statements = 0
+
+        def count_statement(*_args):
+            nonlocal statements
+            statements += 1
 
-        for pdf_file in pdf_files:
-            self.process_pdf(pdf_file)
+        if upload_failures is not None and outstanding_uploads(upload_failures):
+            self.log(
+                f"⚠️  Uploads from earlier runs are waiting in {upload_failures} "
+                "(python scripts/pdf_uploader.py --replay ...)"
+            )
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        started = time.perf_counter()
+        uploader = BulkUploader(workers=upload_workers, failure_queue=upload_failures)
+        try:
+            if workers > 0:
+                self.process_pipelined(pdf_files, workers, uploader)
+                mode = f"pipelined ({workers} parse workers)"
+            else:
+                for pdf_file in pdf_files:
+                    self.record_outcome(pdf_file, self.process_pdf(pdf_file, uploader))
+                mode = "serial"
+            elapsed = time.perf_counter() - started
+        finally:
+            # Even when interrupted, finish the uploads already queued
+            event.remove(engine, "before_cursor_execute", count_statement)
+            upload_report = uploader.close()
 
         self.log("🎉 PDF processing completed!")
+        self.log(
+            f"⏱️  {len(pdf_files)} PDFs in {elapsed:.1f}s "
+            f"({len(pdf_files) / elapsed:.2f} PDFs/s, {mode})"
+        )
+        self.log(f"🧮 {statements / len(pdf_files):.1f} SQL statements per PDF")
+        self.log(
+            "📋 Outcomes: "
+            + ", ".join(f"{outcome} {count}" for outcome, count in self.outcomes.items())
+        )
+        self.log(format_report(upload_report))
+        if upload_report["failed"]:
+            self.log(
+                f"⚠️  {upload_report['failed']} uploads queued for replay in "
+                f"{upload_failures} (python scripts/pdf_uploader.py --replay ...)"
+            )
         self.log(f"📁 All logs saved to: {self.log_file_path}")
 
+        # Ranks and distributions now include the new results
+        refresh_cohort_stats()
+
+    def process_pipelined(self, pdf_files, workers: int, uploader: BulkUploader):
+        """Parse in worker processes, write here in order, upload on threads"""
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_parse_worker,
+            initargs=(self.targeted,),
+        ) as parse_pool:
+            # map yields results in submission order while parsing runs ahead
+            for parsed in parse_pool.map(_parse_in_worker, pdf_files, chunksize=4):
+                self.log(f"📄 Processing: {parsed['path'].name}")
+                self.record_outcome(parsed["path"], self.write_pdf(parsed, uploader))
+
+    def record_outcome(self, pdf_path: Path, outcome: str):
+        self.outcomes[outcome] += 1
+        if self.manifest is not None:
+            self.manifest.record(pdf_path, outcome)
+
+
+# Parse-only processor of each pool process, created once per process
+_parse_worker = None
+
+
+def _init_parse_worker(targeted: bool = True):
+    global _parse_worker
+    _parse_worker = PDFProcessor(worker=True, targeted=targeted)
+
+
+def _parse_in_worker(pdf_path: Path) -> dict:
+    return _parse_worker.parse_pdf(pdf_path)
+
 
 def main():
-    processor = PDFProcessor()
-    processor.process_all_pdfs()
+    parser = argparse.ArgumentParser(description="Ingest result PDFs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) - 1),
+        help="parse worker processes (0 = serial path)",
+    )
+    parser.add_argument("--upload-workers", type=int, default=4)
+    parser.add_argument("--folder", type=Path, help="override the PDF folder")
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=Path("logs") / "ingest_manifest.jsonl",
+        help="record of ingested PDFs used to skip unchanged files",
+    )
+    parser.add_argument(
+        "--upload-failures",
+        type=Path,
+        default=Path("logs") / "upload_failures.jsonl",
+        help="queue of uploads that failed every retry, for pdf_uploader.py --replay",
+    )
+    parser.add_argument(
+        "--all-pages",
+        action="store_true",
+        help="extract every page with default text flags (previous behaviour)",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="ignore the manifest and read every PDF"
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="only process PDFs whose last outcome was failed or missing_student",
+    )
+    args = parser.parse_args()
+
+    processor = PDFProcessor(targeted=not args.all_pages)
+    if args.folder:
+        processor.pdf_folder = args.folder
+    manifest = None
+    if not args.full:
+        manifest = IngestManifest(args.manifest, parser=processor.parser_fingerprint())
+    processor.process_all_pdfs(
+        args.workers,
+        args.upload_workers,
+        manifest=manifest,
+        retry_failed=args.retry_failed,
+        upload_failures=args.upload_failures,
+    )
 
 
 if __name__ == "__main__":
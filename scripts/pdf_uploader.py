@@ -0,0 +1,228 @@
+"""
+PDF Uploader - Concurrent, retrying uploads of result PDFs to Supabase Storage
+Uploads are journaled in a JSON Lines failure queue before they run, so those
+that fail or are cut off by a crash can be replayed
+
+Usage:
+    python scripts/pdf_uploader.py --replay logs/upload_failures.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from database import store_pdf
+
+
+class BulkUploader:
+    """
+    Upload PDFs on a bounded thread pool, retrying each with exponential
+    backoff and jitter
+
+    Uploads are upserts, so retries and replays never fail on objects that
+    already exist. With a failure_queue, every upload is journaled there as
+    "pending" before it is queued and marked "uploaded" or "failed" once it
+    finishes, so uploads lost to a crash are replayed like failed ones (see
+    outstanding_uploads).
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        retries: int = 4,
+        backoff: float = 0.5,
+        failure_queue: Path = None,
+        upload=None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_queue = Path(failure_queue) if failure_queue else None
+        self.upload = upload or store_pdf  # Called as upload(pdf_path, storage_path)
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._futures = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.uploaded = 0
+        self.bytes = 0
+        self.retried = 0
+        self.failed = []
+
+    def journal(self, uploads):
+        """
+        Record (pdf_path, storage_path) pairs as pending in the failure queue
+
+        Call this before committing the rows that need the uploads, so a crash
+        between the commit and the uploads leaves them to replay.
+        """
+        self._append(
+            {
+                "pdf_path": str(pdf_path),
+                "storage_path": storage_path,
+                "status": "pending",
+                "queued_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            for pdf_path, storage_path in uploads
+        )
+
+    def submit(self, pdf_path: Path, storage_path: str, journal: bool = True):
+        """
+        Queue an upload; returns a future resolving to True on success
+
+        journal=False skips the pending entry for uploads already journaled.
+        """
+        if journal:
+            self.journal([(pdf_path, storage_path)])
+        future = self._pool.submit(self._upload, Path(pdf_path), storage_path)
+        self._futures.append(future)
+        return future
+
+    def _upload(self, pdf_path: Path, storage_path: str) -> bool:
+        for attempt in range(self.retries + 1):
+            try:
+                self.upload(pdf_path, storage_path)
+                with self._lock:
+                    self.uploaded += 1
+                    self.bytes += pdf_path.stat().st_size
+                self._append([{"storage_path": storage_path, "status": "uploaded"}])
+                return True
+            except Exception as e:
+                if attempt == self.retries:
+                    self._record_failure(pdf_path, storage_path, e, attempt + 1)
+                    return False
+                with self._lock:
+                    self.retried += 1
+                # 0.5s, 1s, 2s, ... with jitter so workers don't retry in step
+                delay = self.backoff * (2**attempt)
+                time.sleep(delay + random.uniform(0, delay))
+
+    def _record_failure(self, pdf_path: Path, storage_path: str, error, attempts: int):
+        entry = {
+            "pdf_path": str(pdf_path),
+            "storage_path": storage_path,
+            "error": str(error),
+            "attempts": attempts,
+            "status": "failed",
+            "failed_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self.failed.append(entry)
+        self._append([entry])
+
+    def _append(self, entries):
+        """Append entries to the failure queue, if there is one"""
+        if self.failure_queue is None:
+            return
+        lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self._lock:
+            self.failure_queue.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.failure_queue, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def close(self) -> dict:
+        """Wait for every queued upload and return the throughput report"""
+        for future in self._futures:
+            future.result()
+        self._pool.shutdown()
+        return self.report()
+
+    def report(self) -> dict:
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        return {
+            "uploaded": self.uploaded,
+            "failed": len(self.failed),
+            "retries": self.retried,
+            "megabytes": round(self.bytes / 1024 / 1024, 2),
+            "seconds": round(elapsed, 2),
+            "files_per_second": round(self.uploaded / elapsed, 2),
+            "mb_per_second": round(self.bytes / 1024 / 1024 / elapsed, 2),
+        }
+
+
+def format_report(report: dict) -> str:
+    return (
+        f"☁️  Uploaded {report['uploaded']} PDFs ({report['megabytes']} MB) in "
+        f"{report['seconds']}s: {report['files_per_second']} files/s, "
+        f"{report['mb_per_second']} MB/s, {report['retries']} retries, "
+        f"{report['failed']} failed"
+    )
+
+
+def outstanding_uploads(failure_queue: Path) -> dict:
+    """
+    Uploads in failure_queue that have not succeeded since they were queued:
+    failed ones and pending ones a crash cut off
+
+    Returns:
+        storage_path -> latest entry for that object
+    """
+    failure_queue = Path(failure_queue)
+    if not failure_queue.exists():
+        return {}
+
+    entries = {}
+    with open(failure_queue, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by a crash
+            entries[entry["storage_path"]] = entry  # Latest entry per object
+    return {
+        storage_path: entry
+        for storage_path, entry in entries.items()
+        if entry.get("status") != "uploaded"
+    }
+
+
+def replay_failures(failure_queue: Path, workers: int = 4, retries: int = 4) -> dict:
+    """
+    Retry every outstanding upload in failure_queue
+
+    The queue is replaced by the uploads that failed again, dropping the
+    entries of finished uploads, so replaying repeatedly converges on an
+    empty queue. A replay cut short leaves the queue as it was.
+    """
+    failure_queue = Path(failure_queue)
+    if not failure_queue.exists():
+        return BulkUploader(workers=1).close()
+    entries = outstanding_uploads(failure_queue)
+
+    # This replay journals to a fresh file; its failures replace the queue
+    fd, pending_path = tempfile.mkstemp(dir=failure_queue.parent, suffix=".tmp")
+    os.close(fd)
+    uploader = BulkUploader(
+        workers=workers, retries=retries, failure_queue=Path(pending_path)
+    )
+    for entry in entries.values():
+        uploader.submit(entry["pdf_path"], entry["storage_path"])
+    report = uploader.close()
+    with open(pending_path, "w", encoding="utf-8") as f:
+        for entry in uploader.failed:
+            f.write(json.dumps(entry) + "\n")
+    os.replace(pending_path, failure_queue)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay failed PDF uploads")
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        default=Path("logs") / "upload_failures.jsonl",
+        help="failure queue written by pdf_processor.py",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=4)
+    args = parser.parse_args()
+
+    print(format_report(replay_failures(args.replay, args.workers, args.retries)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Shared fixtures: every test runs against a fresh scratch SQLite database,
+never the configured one
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+SCRATCH_DB = Path(tempfile.gettempdir()) / "results_portal_tests.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DB}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import database  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.cache import transcript_cache, grade_change_count_cache  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables, dropped again afterwards"""
+    engine.dispose()
+    SCRATCH_DB.unlink(missing_ok=True)
+    Base.metadata.create_all(engine)
+    transcript_cache.clear()
+    grade_change_count_cache.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+        SCRATCH_DB.unlink(missing_ok=True)
+
+
+@pytest.fixture
+def async_engine(db):
+    """
+    The async engine on the scratch database, discarded afterwards since its
+    connections belong to the test's event loop
+    """
+    database.get_async_sessionmaker()
+    try:
+        yield database.async_engine
+    finally:
+        database.async_engine.sync_engine.dispose(close=False)
+        database.async_engine = None
+        database.AsyncSessionLocal = None
+
+
+@pytest.fixture
+def count_statements():
+    """
+    Context manager factory counting the SQL statements an engine executes
+
+        with count_statements(engine) as statements:
+            ...
+        assert len(statements) == 2
+    """
+
+    @contextmanager
+    def counter(bind):
+        statements = []
+
+        def record(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        event.listen(bind, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(bind, "before_cursor_execute", record)
+
+    return counter
@@ -0,0 +1,35 @@
+"""
+Debounced cohort statistics rebuilds
+"""
+
+import threading
+import time
+
+from app.cohort_stats import DebouncedRefresh
+
+
+def test_burst_of_requests_runs_the_job_once():
+    ran = threading.Event()
+    runs = []
+    refresher = DebouncedRefresh(lambda: (runs.append(1), ran.set()), delay=0.1)
+
+    for _ in range(5):
+        refresher.schedule()
+
+    assert ran.wait(2)
+    time.sleep(0.2)
+    assert runs == [1]
+
+
+def test_steady_requests_cannot_postpone_the_job_past_max_delay():
+    ran = threading.Event()
+    refresher = DebouncedRefresh(ran.set, delay=0.3, max_delay=0.5)
+    started = time.monotonic()
+
+    # Without max_delay, this stream would hold the job off for its whole 2s
+    while not ran.is_set() and time.monotonic() - started < 2:
+        refresher.schedule()
+        time.sleep(0.05)
+
+    assert ran.is_set()
+    assert time.monotonic() - started < 1.5
@@ -0,0 +1,143 @@
+"""
+Grade changes saved through the async API routes
+"""
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import api
+from app.database import GradeChange, Student
+from app.main import app
+
+
+@pytest.fixture
+def client(db, async_engine, monkeypatch):
+    """A client recording every parameter the async engine binds"""
+    monkeypatch.setattr(api.cohort_stats_refresher, "schedule", lambda: None)
+    db.add(Student(regno="113222000001", name="Test Student", dob="01-01-2004"))
+    db.commit()
+
+    bound = []
+
+    def record(_conn, _clause, multiparams, params, _options):
+        # Parameters as handed to the driver's bind processing, before SQLite
+        # turns datetimes into strings
+        for row in [*multiparams, params]:
+            rows = row if isinstance(row, list) else [row]
+            bound.extend(value for item in rows for value in item.values())
+
+    event.listen(async_engine.sync_engine, "before_execute", record)
+    with TestClient(app) as test_client:
+        test_client.bound = bound
+        yield test_client
+
+
+def change(regno="113222000001", new_grade="O"):
+    return {
+        "regno": regno,
+        "subject_code": "21CS101T",
+        "semester": 1,
+        "original_grade": "A",
+        "new_grade": new_grade,
+        "credits": 3,
+        "timestamp": "2024-05-01T10:00:00.000Z",
+    }
+
+
+def assert_naive(values):
+    datetimes = [value for value in values if isinstance(value, datetime)]
+    assert datetimes
+    assert all(value.tzinfo is None for value in datetimes)
+
+
+def test_save_grade_change_binds_naive_ist(client, db):
+    response = client.post("/api/grade-changes/", json=change())
+
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+    assert_naive(client.bound)
+    saved = db.query(GradeChange).one()
+    assert saved.new_grade == "O"
+    assert saved.changed_at == datetime.fromisoformat(response.json()["timestamp"])
+
+
+def login_student(client, regno="113222000001"):
+    response = client.post(
+        f"/users/{regno}/", data={"dob": "01-01-2004"}, follow_redirects=False
+    )
+    assert response.status_code == 302
+
+
+def test_save_grade_changes_batch_binds_naive_ist(client, db):
+    login_student(client)
+    response = client.post(
+        "/api/grade-changes/batch",
+        json={"changes": [change(), change("113222999999"), change(new_grade="B")]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["saved"], body["failed"]) == (2, 1)
+    assert [result["success"] for result in body["results"]] == [True, False, True]
+    assert_naive(client.bound)
+    assert db.query(GradeChange).count() == 2
+
+
+def test_batch_only_saves_changes_for_the_signed_in_student(client, db):
+    db.add(Student(regno="113222000002", name="Other Student", dob="02-02-2004"))
+    db.commit()
+    anonymous = client.post("/api/grade-changes/batch", json={"changes": [change()]})
+    login_student(client)
+
+    response = client.post(
+        "/api/grade-changes/batch",
+        json={"changes": [change("113222000002"), change()]},
+    )
+
+    assert anonymous.json()["results"][0]["message"] == (
+        "Not authorized for this student"
+    )
+    assert [result["success"] for result in response.json()["results"]] == [
+        False,
+        True,
+    ]
+    assert [row.regno for row in db.query(GradeChange)] == ["113222000001"]
+
+
+def test_admin_batch_saves_changes_for_any_student(client, db, monkeypatch):
+    login_admin(client, monkeypatch)
+
+    response = client.post("/api/grade-changes/batch", json={"changes": [change()]})
+
+    assert response.json()["saved"] == 1
+
+
+def login_admin(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_PASSWORD", "admin-secret")
+    response = client.post(
+        "/admin/login/", data={"password": "admin-secret"}, follow_redirects=False
+    )
+    assert response.status_code == 302
+
+
+def test_since_id_pages_through_new_changes_oldest_first(client, db, monkeypatch):
+    login_admin(client, monkeypatch)
+    for grade in "OABCU":
+        fields = change(new_grade=grade)
+        del fields["timestamp"]
+        db.add(GradeChange(**fields))
+    db.commit()
+    ids = [row.id for row in db.query(GradeChange).order_by(GradeChange.id)]
+
+    received, since_id, has_more = [], ids[0] - 1, True
+    while has_more:
+        body = client.get(
+            f"/api/grade-changes/?since_id={since_id}&limit=2&include_total=false"
+        ).json()
+        received += [row["id"] for row in body["changes"]]
+        since_id, has_more = body["latest_id"], body["has_more"]
+
+    assert received == ids
@@ -0,0 +1,40 @@
+"""
+Recomputed GPAs live beside the official ones from the result PDFs
+"""
+
+from app.database import GradeChange, Semester
+from app.grading import recompute_gpas
+from test_transcript import add_student
+
+
+def gpas(db):
+    db.expire_all()
+    return [
+        (float(semester.gpa), semester.adjusted_gpa and float(semester.adjusted_gpa))
+        for semester in db.query(Semester).order_by(Semester.semester)
+    ]
+
+
+def test_only_semesters_with_grade_changes_get_an_adjusted_gpa(db):
+    add_student(db, "113222000001", semesters=2)  # Changes 21CS100T to O
+
+    result = recompute_gpas(db)
+    db.commit()
+
+    # Five A (8) and one O (10) at 3 credits each
+    assert gpas(db) == [(8.5, 8.33), (8.5, None)]
+    assert result["updated"] == 1
+
+
+def test_deleting_the_grade_change_clears_the_adjusted_gpa(db):
+    add_student(db, "113222000001", semesters=2)
+    recompute_gpas(db)
+    db.commit()
+
+    db.query(GradeChange).delete()
+    result = recompute_gpas(db, ["113222000001"])
+    db.commit()
+
+    assert gpas(db) == [(8.5, None), (8.5, None)]
+    assert result["updated"] == 1
+    assert recompute_gpas(db)["updated"] == 0
@@ -0,0 +1,84 @@
+"""
+The ingest manifest skips finished PDFs and retries unparseable ones once the
+parser configuration changes
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from ingest_manifest import IngestManifest  # noqa: E402
+from pdf_processor import PDFProcessor  # noqa: E402
+
+
+def write_pdfs(folder: Path):
+    parsed = folder / "parsed.pdf"
+    unparseable = folder / "unparseable.pdf"
+    parsed.write_bytes(b"%PDF-1.4 parsed")
+    unparseable.write_bytes(b"%PDF-1.4 unparseable")
+    return parsed, unparseable
+
+
+def record_run(manifest_path: Path, parsed: Path, unparseable: Path):
+    manifest = IngestManifest(manifest_path, parser="v1")
+    manifest.pending([parsed, unparseable])
+    manifest.record(parsed, "processed")
+    manifest.record(unparseable, "unparseable")
+
+
+def test_same_parser_skips_unparseable_pdfs(tmp_path):
+    parsed, unparseable = write_pdfs(tmp_path)
+    record_run(tmp_path / "manifest.jsonl", parsed, unparseable)
+
+    manifest = IngestManifest(tmp_path / "manifest.jsonl", parser="v1")
+
+    assert manifest.pending([parsed, unparseable]) == ([], 2)
+
+
+def test_changed_parser_retries_unparseable_pdfs_and_their_copies(tmp_path):
+    parsed, unparseable = write_pdfs(tmp_path)
+    record_run(tmp_path / "manifest.jsonl", parsed, unparseable)
+    copy = tmp_path / "copy.pdf"
+    shutil.copy(unparseable, copy)
+
+    manifest = IngestManifest(tmp_path / "manifest.jsonl", parser="v2")
+
+    assert manifest.pending([parsed, unparseable, copy]) == ([unparseable, copy], 1)
+
+
+def test_parser_fingerprint_follows_the_exam_date_map():
+    processor = PDFProcessor(worker=True)
+    before = processor.parser_fingerprint()
+
+    processor.exam_semester_map["NOV 2025"] = 7
+
+    assert processor.parser_fingerprint() != before
+    assert PDFProcessor(worker=True).parser_fingerprint() == before
+
+
+def test_pdf_without_name_waits_for_its_student(tmp_path, db):
+    pdf = tmp_path / "sem2.pdf"
+    pdf.write_bytes(b"%PDF-1.4 sem2")
+    parsed = {
+        "path": pdf,
+        "error": None,
+        "regno": "113222000001",
+        "semester": 2,
+        "name": None,
+        "dob": "01-01-2004",
+        "gpa": 8.5,
+        "subjects": [],
+        "log": [],
+    }
+    manifest = IngestManifest(tmp_path / "manifest.jsonl", parser="v1")
+    manifest.pending([pdf])
+
+    manifest.record(pdf, PDFProcessor(worker=True).write_pdf(parsed))
+
+    assert manifest.entries[str(pdf)]["outcome"] == "missing_student"
+    assert manifest.pending([pdf]) == ([pdf], 0)
+    assert manifest.pending([pdf], retry_failed=True) == ([pdf], 0)
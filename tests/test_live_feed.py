@@ -0,0 +1,69 @@
+"""
+Live feed delivery of rows committed out of id order
+"""
+
+import asyncio
+
+import pytest
+
+from app import live_feed
+from app.live_feed import LiveFeed, _IdWindow
+
+
+def rows(*ids):
+    return [{"id": row_id} for row_id in ids]
+
+
+def test_late_commit_below_delivered_ids_is_delivered_once():
+    window = _IdWindow(floor=10, lag=30)
+
+    assert window.advance(rows(11, 13), polled_at=0) == rows(11, 13)
+    # 12 commits after 13 was delivered
+    assert window.advance(rows(11, 12, 13), polled_at=3) == rows(12)
+    assert window.advance(rows(11, 12, 13), polled_at=6) == []
+    assert window.floor == 10
+
+
+def test_ids_settle_after_the_commit_lag():
+    window = _IdWindow(floor=10, lag=30)
+    window.advance(rows(11, 13), polled_at=0)
+    window.advance(rows(11, 13, 14), polled_at=20)
+
+    window.advance(rows(11, 13, 14), polled_at=30)
+
+    assert window.floor == 13
+    assert window.seen == {14}
+
+
+def test_concurrent_subscribers_start_one_poller(async_engine, monkeypatch):
+    feed = LiveFeed(poll_interval=60)
+    started = []
+
+    async def subscribe_many():
+        subscribed = asyncio.Event()
+
+        async def run():
+            started.append(1)
+            await subscribed.wait()
+
+        monkeypatch.setattr(feed, "_run", run)
+        await asyncio.gather(*(feed.subscribe() for _ in range(5)))
+        subscribed.set()
+        await feed._task
+
+    asyncio.run(subscribe_many())
+
+    assert started == [1]
+
+
+def test_failed_subscribe_leaves_no_subscriber(async_engine, monkeypatch):
+    feed = LiveFeed(poll_interval=60)
+
+    async def unavailable(_db):
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(live_feed, "fetch_latest_ids", unavailable)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(feed.subscribe())
+    assert feed._subscribers == set()
@@ -0,0 +1,38 @@
+"""
+Login events written through the login log buffer
+"""
+
+from datetime import datetime
+
+from app.database import LoginRollupDaily, StudentLoginLog
+from app.login_log_buffer import LoginLogBuffer
+
+
+def make_buffer():
+    return LoginLogBuffer(max_queue=10, batch_size=10, flush_interval=0.1)
+
+
+def test_record_cuts_fields_to_column_lengths(db):
+    buffer = make_buffer()
+
+    buffer.record("113222000001", "Test Student", "127.0.0.1", "x" * 2000)
+
+    log = db.query(StudentLoginLog).one()
+    assert log.user_agent == "x" * 500
+    assert buffer.stats()["written"] == 1
+
+
+def test_failed_batch_falls_back_to_single_rows(db):
+    buffer = make_buffer()
+    login_time = datetime(2024, 5, 1, 10, 30)
+    rows = [
+        {"regno": regno, "student_name": "Test Student", "login_time": login_time}
+        for regno in ("113222000001", None, "113222000002")  # NULL regno fails
+    ]
+
+    buffer._write(rows)
+
+    assert db.query(StudentLoginLog).count() == 2
+    assert db.query(LoginRollupDaily).one().logins == 2
+    assert buffer.stats()["written"] == 2
+    assert buffer.stats()["failed"] == 1
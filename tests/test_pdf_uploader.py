@@ -0,0 +1,47 @@
+"""
+Uploads are journaled so failed and interrupted ones can be replayed
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from pdf_uploader import BulkUploader, outstanding_uploads  # noqa: E402
+
+
+def fake_upload(pdf_path, storage_path):
+    if "broken" in storage_path:
+        raise ConnectionError("storage unavailable")
+
+
+def test_outstanding_uploads_are_failed_or_cut_off(tmp_path):
+    pdf = tmp_path / "sem1.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    queue = tmp_path / "upload_failures.jsonl"
+    uploader = BulkUploader(
+        workers=2, retries=1, backoff=0, failure_queue=queue, upload=fake_upload
+    )
+
+    # Journaled before a commit, then the run died before submitting it
+    uploader.journal([(pdf, "a/a_sem1.pdf")])
+    uploader.submit(pdf, "b/b_sem1.pdf")
+    uploader.submit(pdf, "broken/broken_sem1.pdf")
+    report = uploader.close()
+
+    assert (report["uploaded"], report["failed"]) == (1, 1)
+    outstanding = outstanding_uploads(queue)
+    assert sorted(outstanding) == ["a/a_sem1.pdf", "broken/broken_sem1.pdf"]
+    assert outstanding["a/a_sem1.pdf"]["status"] == "pending"
+    assert outstanding["broken/broken_sem1.pdf"]["error"] == "storage unavailable"
+
+
+def test_queue_without_status_counts_as_failed(tmp_path):
+    queue = tmp_path / "upload_failures.jsonl"
+    queue.write_text(
+        '{"pdf_path": "x.pdf", "storage_path": "x/x_sem1.pdf", "error": "e"}\n'
+    )
+
+    assert list(outstanding_uploads(queue)) == ["x/x_sem1.pdf"]
@@ -0,0 +1,26 @@
+"""
+Schema upgrades apply each statement on its own
+"""
+
+from sqlalchemy import inspect
+
+from app import database
+from app.database import Subject
+
+
+def test_failed_statement_keeps_the_others(db, monkeypatch):
+    for code in ("21CS101T", "21CS102T"):
+        db.add(Subject(code=code, name="Duplicate", credits=3, semester=1))
+    db.commit()
+    upgrades = [
+        "CREATE UNIQUE INDEX uq_subjects_name ON subjects (name)",
+        "ALTER TABLE subjects ADD COLUMN note VARCHAR(20)",
+    ]
+    monkeypatch.setattr(database, "SCHEMA_UPGRADES", upgrades)
+    monkeypatch.setattr(database.engine.dialect, "name", "postgresql")
+
+    failed = database.upgrade_schema()
+
+    assert failed == upgrades[:1]
+    columns = inspect(database.engine).get_columns("subjects")
+    assert "note" in [column["name"] for column in columns]
@@ -0,0 +1,105 @@
+"""
+The results page loads a whole transcript in a fixed number of statements
+"""
+
+from app.database import Student, Subject, Semester, Grade, GradeChange, engine
+from app.transcript import get_transcript
+
+
+def add_student(db, regno: str, semesters: int, subjects_per_semester: int = 6):
+    student = Student(regno=regno, name="Test Student", dob="01-01-2004")
+    db.add(student)
+    db.flush()
+
+    for number in range(1, semesters + 1):
+        semester = Semester(student_id=student.id, semester=number, gpa=8.5)
+        db.add(semester)
+        db.flush()
+        for index in range(subjects_per_semester):
+            code = f"21CS{number}{index:02d}T"
+            subject = db.query(Subject).filter(Subject.code == code).first()
+            if subject is None:
+                subject = Subject(code=code, name="Subject", credits=3, semester=number)
+                db.add(subject)
+                db.flush()
+            db.add(
+                Grade(
+                    semester_id=semester.id,
+                    subject_id=subject.id,
+                    grade="A",
+                    grade_points_earned=24,
+                )
+            )
+
+    db.add(
+        GradeChange(
+            regno=regno,
+            subject_code="21CS100T",
+            semester=1,
+            original_grade="A",
+            new_grade="O",
+            credits=3,
+        )
+    )
+    db.commit()
+
+
+def load_counting_statements(db, count_statements, regno: str):
+    """Load a transcript the way student_results_page does, counting statements"""
+    db.expire_all()
+    with count_statements(engine) as statements:
+        transcript = get_transcript(db, regno)
+    return transcript, statements
+
+
+def test_transcript_includes_every_semester_and_grade_change(db, count_statements):
+    add_student(db, "113222000001", semesters=8)
+
+    transcript, _ = load_counting_statements(db, count_statements, "113222000001")
+
+    assert [semester["sem"] for semester in transcript["files"]] == list(range(1, 9))
+    first_subject = transcript["files"][0]["subjects"][0]
+    assert first_subject["code"] == "21CS100T"
+    assert first_subject["grade"] == "O"
+    assert first_subject["grade_points_earned"] == 30
+
+
+def test_statement_count_does_not_grow_with_semesters(db, count_statements):
+    add_student(db, "113222000001", semesters=1)
+    add_student(db, "113222000002", semesters=8)
+
+    _, one_semester = load_counting_statements(db, count_statements, "113222000001")
+    _, eight_semesters = load_counting_statements(db, count_statements, "113222000002")
+
+    assert len(one_semester) == len(eight_semesters) == 2
+
+
+def test_cached_transcript_costs_one_stamp_query(db, count_statements):
+    add_student(db, "113222000001", semesters=8)
+    load_counting_statements(db, count_statements, "113222000001")
+
+    _, statements = load_counting_statements(db, count_statements, "113222000001")
+
+    assert len(statements) == 1
+
+
+def test_change_saved_elsewhere_replaces_cached_transcript(db, count_statements):
+    add_student(db, "113222000001", semesters=2)
+    load_counting_statements(db, count_statements, "113222000001")
+
+    # Saved by another worker: this process's cache entry is not invalidated
+    db.add(
+        GradeChange(
+            regno="113222000001",
+            subject_code="21CS200T",
+            semester=2,
+            original_grade="A",
+            new_grade="B",
+            credits=3,
+        )
+    )
+    db.commit()
+
+    transcript, _ = load_counting_statements(db, count_statements, "113222000001")
+
+    assert transcript["files"][1]["subjects"][0]["grade"] == "B"
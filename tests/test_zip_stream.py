@@ -0,0 +1,79 @@
+"""
+Student ZIP bundles fetch their PDFs concurrently from a slow storage backend
+"""
+
+import io
+import threading
+import time
+import zipfile
+
+from app.zip_stream import iter_fetched, iter_pdf_entries, iter_zip
+
+LATENCY = 0.2
+
+
+class FakeStorage:
+    """In-memory storage that sleeps before every download"""
+
+    def __init__(self, objects, latency: float = LATENCY, stalled=()):
+        self.objects = objects
+        self.latency = latency
+        self.stalled = set(stalled)
+        self.release = threading.Event()
+
+    def download(self, path: str):
+        if path in self.stalled:
+            self.release.wait(5)
+            return self.objects.get(path)
+        time.sleep(self.latency)
+        if path == "broken.pdf":
+            raise ConnectionError("storage unavailable")
+        return self.objects.get(path)
+
+
+def test_fetches_overlap_and_keep_input_order():
+    paths = [f"sem{number}.pdf" for number in range(1, 9)]
+    storage = FakeStorage({path: path.encode() for path in paths})
+
+    started = time.monotonic()
+    results = list(iter_fetched(paths, storage.download, max_workers=4))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < len(paths) * LATENCY / 2
+    assert results == [(path, path.encode(), None) for path in paths]
+
+
+def test_manifest_reports_missing_failed_and_timed_out_pdfs():
+    paths = ["sem1.pdf", "missing.pdf", "broken.pdf", "stalled.pdf", "sem5.pdf"]
+    storage = FakeStorage(
+        {"sem1.pdf": b"one", "stalled.pdf": b"late", "sem5.pdf": b"five"},
+        stalled=["stalled.pdf"],
+    )
+
+    try:
+        archive = b"".join(
+            iter_zip(iter_pdf_entries(paths, storage.download, timeout=0.5))
+        )
+    finally:
+        storage.release.set()
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        assert zip_file.namelist() == ["sem1.pdf", "sem5.pdf", "MANIFEST.txt"]
+        assert zip_file.read("sem5.pdf") == b"five"
+        manifest = zip_file.read("MANIFEST.txt").decode("utf-8").splitlines()
+
+    assert manifest == [
+        "sem1.pdf: included",
+        "missing.pdf: not available",
+        "broken.pdf: failed (storage unavailable)",
+        "stalled.pdf: failed (timed out after 0.5s)",
+        "sem5.pdf: included",
+    ]
+
+
+def test_complete_bundle_has_no_manifest():
+    storage = FakeStorage({"sem1.pdf": b"one"}, latency=0)
+
+    entries = list(iter_pdf_entries(["sem1.pdf"], storage.download))
+
+    assert entries == [("sem1.pdf", b"one")]